@@ -0,0 +1,269 @@
+"""Benchmarks of the image processing methods"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from PIL import Image, ImageEnhance
+import cv2
+import numpy as np
+
+from model.editing_tools.adjust import SLIDER_MAX_VALUE, Saturation, Sharpness
+from model.editing_tools.deep_dream import DREAM_FAST_SIZE, DREAM_OCTAVE_SCALE, \
+    DREAM_OCTAVES, DREAM_STEP_SIZE, DREAM_STEPS, DREAM_STEPS_PER_OCTAVE, \
+    DeepDreamActionModel, ImageProcessing
+from model.image_filter import CARTOON_QUALITIES, CartoonFilter
+from model.shape_painter import MAXIMUM_BRUSH_SIZE, MINIMUM_BRUSH_SIZE, SprayEffect
+
+DEFAULT_IMAGE_PATH = './model/style_images/starry_night.jpg'
+STARTUP_SCRIPT = '''
+import sys, time
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+from view import MainWindow
+from controller import MainController
+from model import ImageEditor
+
+def window_shown():
+    print('window', time.time())
+    image_editor.warm_up_tools()
+    image_editor.actions['Style Transfer'].style_transfer_executor.get_model()
+    image_editor.actions['Deep Dream'].deep_dream_network.get_model()
+    print('models', time.time())
+    app.quit()
+
+app = QApplication(sys.argv)
+main_window = MainWindow()
+main_window.show()
+image_editor = ImageEditor()
+MainController(view=main_window, model=image_editor)
+QTimer.singleShot(0, window_shown)
+app.exec()
+'''
+
+
+def measure(function: Callable, repeats: int) -> float:
+    """Returns the best time of several runs of a function, in seconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def load_image(image_path: str, width: int, height: int) -> np.ndarray:
+    """Loads an image and resizes it to the benchmark size"""
+    image = cv2.imread(image_path)
+    if image is None:
+        print(f'The image {image_path} could not be read, a random image is used')
+        image = np.random.randint(0, 256, (height, width, 3), np.uint8)
+    return cv2.resize(image, (width, height), interpolation=cv2.INTER_CUBIC)
+
+
+def benchmark_cartoon(image: np.ndarray, repeats: int):
+    """Compares the cartoon qualities, the high quality is the reference"""
+    reference = CartoonFilter('high').apply_filter(image)
+    print(f'Cartoon filter on a {image.shape[1]}x{image.shape[0]} image')
+    for quality in CARTOON_QUALITIES:
+        cartoon_filter = CartoonFilter(quality)
+        seconds = measure(lambda: cartoon_filter.apply_filter(image), repeats)
+        psnr = cv2.PSNR(cartoon_filter.apply_filter(image), reference)
+        print(f'{quality:>10}: {seconds * 1000:9.1f} ms   PSNR {psnr:5.1f} dB')
+
+
+def enhance_with_pil(image: np.ndarray, enhancer_class: type, factor: float) -> np.ndarray:
+    """Previous implementation of the adjust features, through a PIL image"""
+    pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    pil_image = enhancer_class(pil_image).enhance(factor)
+    return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+
+
+def benchmark_adjust(image: np.ndarray, repeats: int):
+    """Compares the saturation and sharpness features with the PIL enhancers"""
+    value = SLIDER_MAX_VALUE // 2
+    features = {'Saturation': (Saturation(value), ImageEnhance.Color,
+                               (value + SLIDER_MAX_VALUE) / SLIDER_MAX_VALUE),
+                'Sharpness': (Sharpness(value), ImageEnhance.Sharpness,
+                              (value + SLIDER_MAX_VALUE) * 2 / SLIDER_MAX_VALUE)}
+    print(f'Adjust features on a {image.shape[1]}x{image.shape[0]} image')
+    for name, (feature, enhancer_class, factor) in features.items():
+        pil_seconds = measure(lambda: enhance_with_pil(image, enhancer_class, factor), repeats)
+        seconds = measure(lambda: feature.change_image_feature(image), repeats)
+        difference = cv2.absdiff(feature.change_image_feature(image),
+                                 enhance_with_pil(image, enhancer_class, factor)).max()
+        print(f'{name:>10}: PIL {pil_seconds * 1000:7.1f} ms   OpenCV {seconds * 1000:7.1f} ms   '
+              f'speedup {pil_seconds / seconds:4.1f}x   max difference {difference}')
+
+
+def spray_with_loop(mask: np.ndarray, center_position: tuple, size: int):
+    """Previous implementation of the spray, a circle of one pixel per point"""
+    for _ in range(int(np.pi * (size ^ 2) * 0.75)):
+        random_radius = np.random.randint(int(size * 0.15), size + 1)
+        random_degree = np.random.randint(360)
+        x_coordinate = int(random_radius * np.cos(np.radians(random_degree)))
+        y_coordinate = int(random_radius * np.sin(np.radians(random_degree)))
+        cv2.circle(mask, (center_position[0] + x_coordinate, center_position[1] + y_coordinate),
+                   0, (255, 0, 0), cv2.FILLED)
+
+
+def benchmark_spray(image: np.ndarray, repeats: int):
+    """Compares the spray with the loop over its points, at every brush size"""
+    mask = np.zeros(image.shape[:2], dtype=np.uint8)
+    center_position = (image.shape[1] // 2, image.shape[0] // 2)
+    spray = SprayEffect(MINIMUM_BRUSH_SIZE)
+    print('Spray brush, one dab')
+    for size in range(MINIMUM_BRUSH_SIZE, MAXIMUM_BRUSH_SIZE + 1, 10):
+        spray.set_size(size)
+        loop_seconds = measure(lambda: spray_with_loop(mask, center_position, size), repeats)
+        seconds = measure(lambda: spray.draw_on_image(mask, center_position, (255, 0, 0)),
+                          repeats)
+        print(f'{size:>10}: loop {loop_seconds * 1000:7.2f} ms   vectorized '
+              f'{seconds * 1000:7.2f} ms   {spray.points_number:5d} points')
+
+
+def load_through_jpeg(image: np.ndarray, path: str):
+    """Previous input of the style transfer, written to a JPEG file and decoded back"""
+    import tensorflow as tf
+    from model.editing_tools.style_transfer_network import StyleTransferExecutor
+    cv2.imwrite(path, image)
+    img = tf.image.decode_image(tf.io.read_file(path), channels=3)
+    img = tf.image.convert_image_dtype(img, tf.float32)
+    os.remove(path)
+    return StyleTransferExecutor.scale_image(img)[tf.newaxis, :]
+
+
+def benchmark_style_transfer(image: np.ndarray, repeats: int):
+    """Compares the style transfer inputs in memory with the ones through JPEG files, and
+    a run of the whole model with a run of the transformer on a cached style bottleneck"""
+    from model.editing_tools.style_transfer_network import StyleTransferExecutor, postprocess
+    executor = StyleTransferExecutor()
+    style_image = load_image(DEFAULT_IMAGE_PATH, 512, 512)
+    path = os.path.join(tempfile.gettempdir(), 'style_transfer_benchmark.jpg')
+
+    def run_through_jpeg():
+        stylized_image = executor.ml_model(load_through_jpeg(image, path),
+                                           load_through_jpeg(style_image, path))[0]
+        postprocess(stylized_image, image.shape)
+
+    print(f'Style transfer on a {image.shape[1]}x{image.shape[0]} image')
+    jpeg_seconds = measure(lambda: (load_through_jpeg(image, path),
+                                    load_through_jpeg(style_image, path)), repeats)
+    seconds = measure(lambda: (executor.load_img(image), executor.load_img(style_image)),
+                      repeats)
+    print(f'{"inputs":>10}: JPEG {jpeg_seconds * 1000:7.1f} ms   memory {seconds * 1000:7.1f} ms')
+    if not executor.is_split():
+        print(f'{"style":>10}: unavailable, the model could not be split')
+        return
+    style_bottleneck = executor.predict_style_bottleneck(style_image)
+    seconds = measure(lambda: executor.predict_style_bottleneck(style_image), repeats)
+    print(f'{"style":>10}: bottleneck {seconds * 1000:7.1f} ms, once per style')
+    jpeg_seconds = measure(run_through_jpeg, repeats)
+    seconds = measure(lambda: executor.apply_style_transfer(style_bottleneck, image), repeats)
+    print(f'{"run":>10}: JPEG and whole model {jpeg_seconds * 1000:7.1f} ms   memory and '
+          f'cached bottleneck {seconds * 1000:7.1f} ms')
+
+
+def benchmark_deep_dream(image: np.ndarray, _):
+    """Measures the first step of every dream, which builds and traces its model the first
+    time, apart from the following steps, and compares the square dream with the tiled
+    octaves at full resolution and in fast mode"""
+    from model.editing_tools.deep_dream_network import DeepDreamNetwork
+    network = DeepDreamNetwork()
+    dream_image = cv2.resize(image, (500, 500), interpolation=cv2.INTER_AREA)
+    print(f'Deep dream on a 500x500 image, {DREAM_STEPS} steps')
+    for dream_name, layer_names in DeepDreamActionModel(None).deep_dream_layers.items():
+        for run in ('new', 'cached'):
+            network.dream(dream_image, layer_names, DREAM_STEPS, DREAM_STEP_SIZE)
+            timings = network.get_last_timings()
+            print(f'{dream_name:>10}: {run:>6} model   first step {timings.first_step * 1000:8.1f} '
+                  f'ms   per step {timings.per_step * 1000:7.1f} ms')
+
+    fast_image = ImageProcessing.resize_img(image, max_dim=DREAM_FAST_SIZE)
+    print(f'Square dream on a 500x500 image against tiled octaves on the '
+          f'{image.shape[1]}x{image.shape[0]} image and on its '
+          f'{fast_image.shape[1]}x{fast_image.shape[0]} fast mode image, '
+          f'{len(DREAM_OCTAVES)} octaves of {DREAM_STEPS_PER_OCTAVE} steps')
+    for dream_name, layer_names in DeepDreamActionModel(None).deep_dream_layers.items():
+        square_seconds = measure(lambda: network.dream(dream_image, layer_names, DREAM_STEPS,
+                                                       DREAM_STEP_SIZE), 1)
+        octave_seconds = [measure(lambda: network.dream_octaves(octave_image, layer_names,
+                                                                DREAM_OCTAVES,
+                                                                DREAM_OCTAVE_SCALE,
+                                                                DREAM_STEPS_PER_OCTAVE,
+                                                                DREAM_STEP_SIZE), 1)
+                          for octave_image in (image, fast_image)]
+        print(f'{dream_name:>10}: square {square_seconds:6.1f} s   '
+              f'full resolution {octave_seconds[0]:6.1f} s   fast {octave_seconds[1]:6.1f} s')
+
+
+def get_last_error(stderr: str) -> str:
+    """Last exception line of the error output, or its last line if there is none"""
+    errors = re.findall(r'^[\w.]+(?:Error|Exception): .*$', stderr, re.MULTILINE)
+    return errors[-1] if errors else (stderr.strip().splitlines() or [''])[-1]
+
+
+def benchmark_startup(_, repeats: int):
+    """Measures the time until the main window is shown and until the models are loaded
+    in the background, in a new process every time"""
+    window_timings, models_timings = [], []
+    models_error = ''
+    for _ in range(repeats):
+        launch_time = time.time()
+        result = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        times = dict(line.split() for line in result.stdout.splitlines()
+                     if line.startswith(('window ', 'models ')))
+        error = get_last_error(result.stderr)
+        if 'window' not in times:
+            print(f'Error: the application could not start: {error}')
+            return
+        window_timings.append(float(times['window']) - launch_time)
+        if 'models' in times:
+            models_timings.append(float(times['models']) - launch_time)
+        else:
+            models_error = error
+    print('Application startup')
+    print(f'{"window":>10}: {min(window_timings) * 1000:9.1f} ms')
+    if models_timings:
+        print(f'{"models":>10}: {min(models_timings) * 1000:9.1f} ms')
+    else:
+        print(f'{"models":>10}: unavailable, {models_error}')
+
+
+BENCHMARKS = {'cartoon': benchmark_cartoon,
+              'adjust': benchmark_adjust,
+              'spray': benchmark_spray,
+              'style_transfer': benchmark_style_transfer,
+              'deep_dream': benchmark_deep_dream,
+              'startup': benchmark_startup}
+
+
+def main():
+    """Runs the benchmarks chosen in the command line"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('benchmarks', nargs='*',
+                        help=f'benchmarks to run, all of them by default: {", ".join(BENCHMARKS)}')
+    parser.add_argument('--image', default=DEFAULT_IMAGE_PATH, help='input image path')
+    parser.add_argument('--width', type=int, default=1920, help='input image width')
+    parser.add_argument('--height', type=int, default=1080, help='input image height')
+    parser.add_argument('--repeats', type=int, default=3, help='runs of every measurement')
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f'There is no benchmark with name {name}')
+
+    image = load_image(args.image, args.width, args.height)
+    for name in args.benchmarks or BENCHMARKS:
+        try:
+            BENCHMARKS[name](image, args.repeats)
+        except ImportError as error:
+            print(f'{name:>10}: unavailable, {error}')
+
+
+if __name__ == '__main__':
+    main()
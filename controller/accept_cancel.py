@@ -1,12 +1,14 @@
 """Accept and cancel controller module"""
 from PyQt5.QtWidgets import QAction
 from .image_viewer import ImageViewerController
+from .render_scheduler import RenderScheduler
 
 
 class AcceptCancelController:
     """Controller of the element that accepts or cancels the edited picture"""
     def __init__(self, view, model, accept_action: QAction, cancel_action: QAction):
         self.image_viewer_controller = ImageViewerController(view, model)
+        self.render_scheduler = RenderScheduler.get_instance()
         self.view = view
         self.model = model
         self.accept_action = accept_action
@@ -16,11 +18,13 @@ class AcceptCancelController:
 
     def accept_and_update_image(self):
         """Inserts the image and updates the element that displays it"""
+        self.render_scheduler.flush()
         self.model.insert_new_image()
         self.image_viewer_controller.display_image(self.model.get_current_pixmap)
 
     def cancel_and_update_image(self):
         """Simply displays the current image and not the temporary"""
+        self.render_scheduler.cancel()
         self.image_viewer_controller.display_image(self.model.get_current_pixmap)
 
     def connect_accept_and_cancel_actions(self):
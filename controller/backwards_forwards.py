@@ -22,12 +22,12 @@ class BackwardsForwardsActionsController:
 
     def update_state(self):
         """Updates the view depending on the state"""
-        if self.model.idx_current_img == 0:
+        if self.model.history_img.get_index() == 0:
             if len(self.model.history_img) < 2:
                 self.backwards_forwards_action.update_state_view('')
             else:
                 self.backwards_forwards_action.update_state_view('r')
-        elif self.model.idx_current_img == len(self.model.history_img) - 1:
+        elif self.model.history_img.get_index() == len(self.model.history_img) - 1:
             self.backwards_forwards_action.update_state_view('l')
         else:
             self.backwards_forwards_action.update_state_view('b')
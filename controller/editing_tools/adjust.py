@@ -1,11 +1,16 @@
 """Adjust controller file"""
+import functools
+from typing import List
+
 from PyQt5.QtWidgets import QMessageBox
+import numpy as np
 
 from model.editing_tools import AdjustActionModel
-from model.editing_tools.adjust import SLIDER_MAX_VALUE
+from model.editing_tools.adjust import SLIDER_MAX_VALUE, FeatureStrategy
 from view.editing_tools.adjust import AdjustAction
 from .editing_tool import EditingTool
 from ..image_viewer import ImageViewerController
+from ..render_scheduler import RenderScheduler
 
 
 class AdjustActionController(EditingTool):
@@ -36,6 +41,7 @@ class AdjustFeaturesController:
         self.adjust_tools = self.adjust_action.adjust_tools
         self.adjust_model = adjust_model
         self.image_viewer_controller = image_viewer_controller
+        self.render_scheduler = RenderScheduler.get_instance()
         self.connect_features_action_signals()
 
     def configure_slider(self):
@@ -43,6 +49,7 @@ class AdjustFeaturesController:
         self.adjust_tools.features_slider.setRange(-SLIDER_MAX_VALUE, SLIDER_MAX_VALUE)
         self.adjust_tools.features_slider.setEnabled(False)
         self.adjust_tools.features_slider.valueChanged.connect(self.slider_value_changed)
+        self.adjust_tools.features_slider.sliderReleased.connect(self.slider_released)
 
     def connect_features_action_signals(self):
         """Connects the action signals to emit the action name"""
@@ -60,7 +67,35 @@ class AdjustFeaturesController:
         self.adjust_tools.features_slider.setValue(self.adjust_model.get_feature_value())
 
     def slider_value_changed(self, value: int):
-        """Changes the value of the slider"""
+        """Changes the value of the slider. A proxy of the image is displayed while the
+        slider is dragged, the full resolution image is computed when it is released"""
         self.adjust_action.accept_and_cancel.accept_action.setEnabled(True)
-        self.adjust_model.change_value(value)
+        self.adjust_model.set_feature_value(value)
+        if self.adjust_tools.features_slider.isSliderDown():
+            self.request_preview()
+        else:
+            self.request_image()
+
+    def slider_released(self):
+        """Computes the full resolution image once the slider is released"""
+        self.request_image()
+
+    def request_preview(self):
+        """Schedules the render of the proxy image with the current values"""
+        self.render_scheduler.request(
+            functools.partial(self.adjust_model.render_preview,
+                              self.adjust_model.get_features_copy(),
+                              *self.image_viewer_controller.get_viewport_size()),
+            self.image_viewer_controller.display_rendered_preview)
+
+    def request_image(self):
+        """Schedules the render of the full resolution image with the current values"""
+        features = self.adjust_model.get_features_copy()
+        self.render_scheduler.request(
+            functools.partial(self.adjust_model.render, features),
+            functools.partial(self.display_edited_image, features))
+
+    def display_edited_image(self, features: List[FeatureStrategy], image: np.ndarray):
+        """Displays a rendered image"""
+        self.adjust_model.set_edited_image(image, features)
         self.image_viewer_controller.display_image()
@@ -2,7 +2,6 @@
 import enum
 
 from PyQt5.QtCore import Qt, pyqtSlot, QPointF, QObject, pyqtSignal
-from PyQt5.QtGui import QPainter, QPen, QPixmap
 from PyQt5.QtWidgets import QMessageBox
 from view.editing_tools import EditingToolAction
 from view.editing_tools.crop import MIN_HEIGHT, MIN_WIDTH, CropTools
@@ -19,7 +18,6 @@ class CropActionController(EditingTool):
         self.crop_model = self.model.actions['Crop']
         self.rectangle = Rectangle(view, model)
         self.mouse = CropMouseListener(self.rectangle)
-        self.pixmap = QPixmap()
         self.signal_receiver = SignalReceiver(self, self.rectangle)
         self.crop_tools_controller = CropToolsController(crop_action.crop_tools,
                                                          self.rectangle, model)
@@ -33,10 +31,6 @@ class CropActionController(EditingTool):
         self.rectangle.set_width(img_width)
         self.rectangle.set_height(img_height)
 
-        self.pixmap = self.model.get_current_pixmap()
-        self.rectangle.painter.set_pixmap(self.pixmap)
-        self.rectangle.painter.draw()
-
     def enable_accept_action(self, value):
         """Receives a signal to enable the accept action"""
         self.accept_action.setDisabled(not value)
@@ -73,6 +67,7 @@ class CropActionController(EditingTool):
             self.mouse.pressed_moving_signal.disconnect(self.signal_receiver.change_rect)
             self.mouse.destroy_listener()
             self.image_viewer.image_view.viewport().setCursor(Qt.ArrowCursor)
+            self.rectangle.painter.hide()
             self.crop_tools_controller.rectangle_changed_signal.\
                 disconnect(self.enable_accept_action)
 
@@ -86,7 +81,6 @@ class CropActionController(EditingTool):
         self.connect_signals_between_elements(True)
         self.set_initial_rectangle()
         self.rectangle.painter.draw()
-        self.image_viewer.graphics_pixmap.setPixmap(self.pixmap)
         self.crop_tools_controller.display_rect_shape_param()
 
     def connect_signals(self):
@@ -104,7 +98,7 @@ class Rectangle:
         self.origin: list = [0, 0]
         self.size: list = [0, 0]
 
-        self.get_current_pixmap = model.get_current_pixmap
+        self.get_image_size = model.get_current_image_size
         self.image_viewer = view.image_viewer
 
         self.hovered_part = RectanglePart.NONE
@@ -130,10 +124,7 @@ class Rectangle:
 
     def display_rect(self):
         """Displays the rectangle on the image viewer"""
-        pixmap = self.get_current_pixmap()
-        self.painter.set_pixmap(pixmap)
         self.painter.draw()
-        self.image_viewer.graphics_pixmap.setPixmap(pixmap)
 
 
 class CropToolsController(QObject):
@@ -395,6 +386,7 @@ class RectangleShapeChanger(QObject):
 
     def out_of_bounds_control(self):
         """Checks if the rectangle gets out of the boundaries and adjusts the shape"""
+        image_height, image_width = self.rectangle.get_image_size()
         if self.rectangle.origin[0] < 0:
             self.rectangle.set_origin_x(0)
             if self.rectangle.hovered_part != RectanglePart.INSIDE:
@@ -405,22 +397,16 @@ class RectangleShapeChanger(QObject):
             if self.rectangle.hovered_part != RectanglePart.INSIDE:
                 self.change_height(self.initial_height_before_pressing
                                    + self.initial_origin_y_before_pressing)
-        if self.rectangle.origin[0] + self.rectangle.size[0] \
-                >= self.rectangle.painter.pixmap.width():
+        if self.rectangle.origin[0] + self.rectangle.size[0] >= image_width:
             if self.rectangle.hovered_part != RectanglePart.INSIDE:
-                self.change_width(self.rectangle.painter.pixmap.width()
-                                  - self.rectangle.origin[0])
+                self.change_width(image_width - self.rectangle.origin[0])
             else:
-                self.change_origin_x(self.rectangle.painter.pixmap.width()
-                                     - self.rectangle.size[0])
-        if self.rectangle.origin[1] + self.rectangle.size[1] \
-                >= self.rectangle.painter.pixmap.height():
+                self.change_origin_x(image_width - self.rectangle.size[0])
+        if self.rectangle.origin[1] + self.rectangle.size[1] >= image_height:
             if self.rectangle.hovered_part != RectanglePart.INSIDE:
-                self.change_height(self.rectangle.painter.pixmap.height()
-                                   - self.rectangle.origin[1])
+                self.change_height(image_height - self.rectangle.origin[1])
             else:
-                self.change_origin_y(self.rectangle.painter.pixmap.height()
-                                     - self.rectangle.size[1])
+                self.change_origin_y(image_height - self.rectangle.size[1])
 
 
 class RectanglePart(enum.Enum):
@@ -438,62 +424,19 @@ class RectanglePart(enum.Enum):
 
 
 class RectanglePainter:
-    """Manages the rectangle painting"""
+    """Manages the rectangle painting, it is displayed over the image and the
+    image itself is never painted"""
     def __init__(self, rect: Rectangle):
         self.rect = rect
-        self.pixmap = QPixmap()
-        self.pen_dash_line = QPen()
-        self.pen_dash_line.setColor(Qt.white)
-        self.pen_dash_line.setStyle(Qt.DashLine)
-        self.pen_dash_line.setWidth(1)
-
-        self.lines_painter = QPainter()
-        self.pen_solid_line = QPen()
-        self.pen_solid_line.setColor(Qt.white)
-        self.pen_solid_line.setWidth(2)
-
-        self.rect_painter = QPainter()
-
-    def set_pixmap(self, pixmap: QPixmap):
-        """Pixmap setter"""
-        self.pixmap = pixmap
-
-    def draw_rect(self):
-        """Draws the rectangle"""
-        self.rect_painter = QPainter(self.pixmap)
-        self.rect_painter.setPen(self.pen_solid_line)
-
-        self.rect_painter.drawRect(self.rect.origin[0], self.rect.origin[1],
-                                   self.rect.size[0], self.rect.size[1])
-        self.rect_painter.end()
-
-    def draw_lines(self):
-        """Draws the inner rectangle lines"""
-        self.lines_painter = QPainter(self.pixmap)
-        self.lines_painter.setPen(self.pen_dash_line)
-
-        self.lines_painter.drawLine(self.rect.origin[0] + self.rect.size[0] / 3,
-                                    self.rect.origin[1],
-                                    self.rect.origin[0] + self.rect.size[0] / 3,
-                                    self.rect.origin[1] + self.rect.size[1])
-        self.lines_painter.drawLine(self.rect.origin[0] + self.rect.size[0] * 2 / 3,
-                                    self.rect.origin[1],
-                                    self.rect.origin[0] + self.rect.size[0] * 2 / 3,
-                                    self.rect.origin[1] + self.rect.size[1])
-        self.lines_painter.drawLine(self.rect.origin[0],
-                                    self.rect.origin[1] + self.rect.size[1] / 3,
-                                    self.rect.origin[0] + self.rect.size[0],
-                                    self.rect.origin[1] + self.rect.size[1] / 3)
-        self.lines_painter.drawLine(self.rect.origin[0],
-                                    self.rect.origin[1] + self.rect.size[1] * 2 / 3,
-                                    self.rect.origin[0] + self.rect.size[0],
-                                    self.rect.origin[1] + self.rect.size[1] * 2 / 3)
-        self.lines_painter.end()
 
     def draw(self):
-        """Draws the rectangle and its inner lines"""
-        self.draw_rect()
-        self.draw_lines()
+        """Draws the rectangle, its inner lines and its handles"""
+        self.rect.image_viewer.display_crop_frame(self.rect.origin[0], self.rect.origin[1],
+                                                  self.rect.size[0], self.rect.size[1])
+
+    def hide(self):
+        """Hides the rectangle"""
+        self.rect.image_viewer.hide_crop_frame()
 
 
 class SignalReceiver(QObject):
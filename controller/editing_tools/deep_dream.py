@@ -24,6 +24,8 @@ class DeepDreamActionController(EditingTool):
         self.model.create_temp_image()
         self.deep_dream_tools_controller.connect_signals_to_slots()
         self.action.display_items()
+        self.action.deep_dream_tools.fast_mode_checkbox.setChecked(
+            self.model.actions['Deep Dream'].is_fast_mode())
         self.model.actions['Deep Dream'].resize_original_image()
 
 
@@ -57,17 +59,24 @@ class DeepDreamToolsController:
         [connect(action) for action in self.deep_dream_tools.dreams_list]
 
     def apply_dream(self, dream_name: str):
-        """Method that initializes the thread for applying the deep dream"""
+        """Method that initializes the thread for applying the deep dream, in fast mode
+        if it is checked"""
+        self.deep_dream_model.set_fast_mode(self.deep_dream_tools.fast_mode_checkbox.isChecked())
         QApplication.setOverrideCursor(Qt.WaitCursor)
         self.view.tool_bar.setAttribute(Qt.WA_TransparentForMouseEvents)
         self.deep_dream_thread = Thread(target=self.deep_dream_model.apply_dream,
                                         args=(dream_name,))
         self.deep_dream_thread.start()
 
-    def deep_dream_applied_slot(self):
-        """Method to update the displayed image and join the thread"""
-        self.image_viewer_controller.display_image()
+    def deep_dream_applied_slot(self, succeeded: bool):
+        """Method to update the displayed image and join the thread, the editor is
+        unlocked even if the dream could not be applied"""
         self.deep_dream_thread.join()
         self.view.tool_bar.setAttribute(Qt.WA_TransparentForMouseEvents, False)
-        self.deep_dream_view.accept_and_cancel.accept_action.setEnabled(True)
         QApplication.restoreOverrideCursor()
+        if not succeeded:
+            QMessageBox(self.view).information(self.view, 'Information',
+                                               'The dream could not be applied')
+            return
+        self.image_viewer_controller.display_image()
+        self.deep_dream_view.accept_and_cancel.accept_action.setEnabled(True)
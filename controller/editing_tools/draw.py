@@ -1,17 +1,19 @@
 """Crop controller file"""
-from PyQt5.QtCore import QPointF, Qt, pyqtSignal, QObject
+from PyQt5.QtCore import QPointF, Qt, pyqtSignal, QObject, QTimer
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QMessageBox, QColorDialog
 
 from controller.editing_tools import EditingTool
-from controller.editing_tools.editing_tool import ButtonContainerController
+from controller.editing_tools.filter import FilterButtonContainerController
 from controller.image_viewer import ImageViewerController
 from controller.mouse_listener import MouseListener
-from model.editing_tools import DrawActionModel, FilterActionModel
+from model.editing_tools import DrawActionModel
 from model.shape_painter import MINIMUM_BRUSH_SIZE, MAXIMUM_BRUSH_SIZE
 from view.accept_cancel import AcceptCancelContainer
 from view.editing_tools.draw import DrawAction, EffectAction
 
+STROKE_FRAME_INTERVAL = 16
+
 
 class DrawActionController(EditingTool):
     """Controller of the drawing action"""
@@ -69,11 +71,13 @@ class DrawActionController(EditingTool):
             self.image_viewer.signal_sender.mouse_pressed_image_signal_coordinate. \
                 disconnect(self.signal_receiver.image_pressed)
             self.mouse_listener.destroy_listener()
+            self.image_viewer.hide_brush_cursor()
             self.mouse_listener.press_image_signal.disconnect(self.signal_receiver.paint_on_image)
 
     def accept_edited_image(self):
         """Updates the temporary image and updates the element that displays it"""
-        self.model.tmp_img = self.draw_model.image_painter.images_container.img
+        self.signal_receiver.paint_stroke()
+        self.model.tmp_img = self.draw_model.image_painter.get_edited_image()
         self.accept_cancel_controller.accept_and_update_image()
 
     def connect_signals(self):
@@ -93,15 +97,14 @@ class DrawActionController(EditingTool):
 class DrawMouseListener(MouseListener):
     """Listens to the mouse events to update the image"""
 
-    press_image_signal = pyqtSignal(QPointF, bool)
+    press_image_signal = pyqtSignal(QPointF)
 
     def on_move(self, pos_x, pos_y):
         if self.pressed and self.on_pixmap:
             moved_x = pos_x - self.initial_pos[0]
             moved_y = pos_y - self.initial_pos[1]
             self.press_image_signal.emit(QPointF(moved_x + self.initial_pressed_coordinate.x(),
-                                                 moved_y + self.initial_pressed_coordinate.y()),
-                                         False)
+                                                 moved_y + self.initial_pressed_coordinate.y()))
 
     def on_click(self, pos_x, pos_y, _, pressed):
         if pressed:
@@ -123,23 +126,43 @@ class SignalReceiver:
         self.mouse_listener = mouse_listener
         self.draw_model: DrawActionModel = self.image_viewer_controller.model.actions['Draw']
 
+        self.stroke_timer = QTimer()
+        self.stroke_timer.setSingleShot(True)
+        self.stroke_timer.setInterval(STROKE_FRAME_INTERVAL)
+        self.stroke_timer.timeout.connect(self.paint_stroke)
+
     def cursor_on_pixmap(self, cursor_pos: QPointF):
-        """Changes the cursor shape when it hovers on the pixmap and draws the cursor"""
+        """Displays the brush outline as the cursor when it hovers on the pixmap"""
         self.mouse_listener.on_pixmap = True
-        self.paint_on_image(cursor_pos=cursor_pos, hover=True)
-        self.draw_model.image_painter.remove_cursor()
+        self.display_brush_cursor(cursor_pos)
 
     def image_pressed(self, cursor_pos: QPointF):
         """Receives a signal when the image is pressed and paints on the picture"""
         self.mouse_listener.pressed = True
-        self.paint_on_image(cursor_pos=cursor_pos, hover=False)
+        self.draw_model.image_painter.start_stroke(cursor_pos)
+        self.paint_stroke()
+        self.display_brush_cursor(cursor_pos)
         self.mouse_listener.set_initial_pressed_coordinate(cursor_pos)
 
-    def paint_on_image(self, cursor_pos: QPointF, hover: bool):
-        """Updates the image and displays it"""
-        self.draw_model.image_painter.edit_image(cursor_pos, paint=not hover)
-        self.image_viewer_controller.\
-            display_image(self.draw_model.image_painter.get_edited_img_pixmap)
+    def paint_on_image(self, cursor_pos: QPointF):
+        """Adds the position to the stroke, the stroke is painted once per frame"""
+        self.draw_model.image_painter.continue_stroke(cursor_pos)
+        self.display_brush_cursor(cursor_pos)
+        if not self.stroke_timer.isActive():
+            self.stroke_timer.start()
+
+    def paint_stroke(self):
+        """Paints the pending dabs of the stroke and displays the region that changed"""
+        self.stroke_timer.stop()
+        image_painter = self.draw_model.image_painter
+        self.image_viewer_controller.display_image_region(image_painter.get_edited_region,
+                                                          image_painter.paint_stroke())
+
+    def display_brush_cursor(self, cursor_pos: QPointF):
+        """Displays the outline of the brush centered on the pixel of the cursor"""
+        self.image_viewer.display_brush_cursor(
+            self.draw_model.image_painter.get_cursor_outline(),
+            QPointF(int(cursor_pos.x()), int(cursor_pos.y())))
 
     def mouse_entered_the_pixmap(self):
         """Slot that receives a signal when the mouse is on the pixmap
@@ -150,8 +173,7 @@ class SignalReceiver:
         """Restores the cursor back to the arrow shape when it leaves the pixmap"""
         self.mouse_listener.on_pixmap = False
         self.image_viewer.image_view.viewport().setCursor(Qt.ArrowCursor)
-        self.image_viewer_controller.\
-            display_image(self.draw_model.image_painter.get_edited_img_pixmap)
+        self.image_viewer.hide_brush_cursor()
 
 
 class BrushShapeController:
@@ -211,10 +233,9 @@ class EffectActionController:
 
     def display_filter_buttons(self):
         """Displays the filter buttons"""
-        self.draw_model.filter_container.\
-            apply_filters(self.draw_model.image_painter.images_container.img)
-        self.effect_action.display_filter_buttons(
-            self.draw_model.filter_container.get_filtered_images_pixmap())
+        self.draw_model.set_filters_image()
+        self.effect_action.display_filter_buttons()
+        self.draw_model.filter_container.request_previews()
 
 
 class CancelControllerDraw(QObject):
@@ -245,12 +266,11 @@ class CancelControllerDraw(QObject):
         self.pressed_cancel_signal.emit(self.draw_model.brush_size)
 
 
-class FilterButtonContainerControllerEffect(ButtonContainerController):
+class FilterButtonContainerControllerEffect(FilterButtonContainerController):
     """Controller of the filter buttons container"""
     def __init__(self, view, model,
                  effect_action: EffectAction, cancel_controller: CancelControllerDraw):
         self.draw_model: DrawActionModel = model.actions['Draw']
-        self.filter_model: FilterActionModel = model.actions['Filter']
         super().__init__(view, model, effect_action)
         self.cancel_action = cancel_controller.cancel_action
 
@@ -265,11 +285,6 @@ class FilterButtonContainerControllerEffect(ButtonContainerController):
 
         [connect(button) for button in self.button_container.buttons]
 
-    def initialize_filter_buttons(self):
-        """Initial setup of the components"""
-        self.button_container.populate_buttons(
-            len(self.filter_model.filter_container))
-
     def trigger_cancel_action(self):
         """Triggers the cancel action"""
         self.cancel_action.trigger()
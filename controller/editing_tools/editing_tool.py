@@ -3,6 +3,7 @@ from abc import ABC, abstractmethod
 
 from controller.accept_cancel import AcceptCancelController
 from controller.image_viewer import ImageViewerController
+from controller.render_scheduler import RenderScheduler
 from controller.utils import connect_button_to_slot
 from view.editing_tools import EditingToolAction
 
@@ -34,7 +35,9 @@ class EditingTool(ABC):
         """Places the tools on the bar"""
 
     def connect_action_signal(self):
-        """The action to the function that displays the editing elements"""
+        """The action to the function that displays the editing elements, the renders
+        of the previous tool are dropped"""
+        self.action.triggered.connect(lambda: RenderScheduler.get_instance().cancel())
         self.action.triggered.connect(lambda: self.show_tools())
 
 
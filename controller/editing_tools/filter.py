@@ -24,10 +24,10 @@ class FilterActionController(EditingTool):
             QMessageBox(self.view).information(self.view,  'Information', 'Nothing to edit')
             return
         self.model.create_temp_image()
-        self.filter_model.filter_container.apply_filters(self.model.tmp_img)
-        self.action.button_container.update_button_image(self.filter_model.
-                                           filter_container.get_filtered_images_pixmap())
+        self.filter_model.filter_container.set_image(self.model.tmp_img,
+                                                     self.model.get_current_image_version())
         self.action.display_items()
+        self.filter_model.filter_container.request_previews()
 
     def connect_filter_buttons_with_accept_filter_button(self):
         """Connects the button signals"""
@@ -57,3 +57,15 @@ class FilterButtonContainerController(ButtonContainerController):
         """Initial setup of the components"""
         self.button_container.populate_buttons(
             len(self.filter_model.filter_container))
+        self.button_container.set_button_names(
+            self.filter_model.filter_container.get_filter_names())
+        self.filter_model.filter_container.signal_sender.preview_filtered.connect(
+            self.update_button_image)
+
+    def update_button_image(self, filter_name: str):
+        """Displays the preview of a filter as soon as it is ready"""
+        filter_container = self.filter_model.filter_container
+        pixmap = filter_container.get_preview_pixmap(filter_name)
+        if pixmap is not None:
+            self.button_container.set_button_image(
+                filter_container.get_filter_index(filter_name), filter_name, pixmap)
@@ -1,8 +1,12 @@
 """Resize action controller module"""
+import functools
+
 from PyQt5.QtWidgets import QMessageBox
+import numpy as np
 from PyQt5.QtCore import pyqtSignal, QObject
 
 from controller.image_viewer import ImageViewerController
+from controller.render_scheduler import RenderScheduler
 from view.editing_tools import EditingToolAction
 from view.editing_tools.resize import MAX_HEIGHT, MAX_WIDTH
 
@@ -42,6 +46,7 @@ class ResizeToolsController(QObject):
     def __init__(self, view, model):
         super().__init__()
         self.image_viewer_controller = ImageViewerController(view, model)
+        self.render_scheduler = RenderScheduler.get_instance()
         self.view = view
         self.model = model
         self.resize_tools = self.view.tool_bar.editing_action_container['Resize'].resize_tools
@@ -60,7 +65,29 @@ class ResizeToolsController(QObject):
     def new_image(self):
         """Actions carried out when a new image is loaded"""
         self.image_viewer_controller.display_image(self.model.get_temp_pixmap)
+        self.emit_size_changed()
+
+    def request_image(self):
+        """Schedules the resize, a proxy of the image is resized while the slider is dragged"""
+        resize_model = self.model.actions['Resize']
+        if self.resize_tools.size_slider.isSliderDown():
+            self.render_scheduler.request(
+                functools.partial(resize_model.render_preview, self.new_width, self.new_height,
+                                  *self.image_viewer_controller.get_viewport_size()),
+                self.image_viewer_controller.display_rendered_preview)
+        else:
+            self.render_scheduler.request(
+                functools.partial(resize_model.render, self.new_width, self.new_height),
+                functools.partial(self.display_resized_image, self.new_width, self.new_height))
+        self.emit_size_changed()
+
+    def display_resized_image(self, width: int, height: int, image: np.ndarray):
+        """Displays a resized image"""
+        self.model.actions['Resize'].set_resized_image(image, width, height)
+        self.new_image()
 
+    def emit_size_changed(self):
+        """Emits whether the new size is the same as the current one"""
         if (self.new_height, self.new_width) == self.model.get_current_image_size():
             self.size_changed.emit(True)
         else:
@@ -82,13 +109,11 @@ class ResizeToolsController(QObject):
             elif self.new_height > MAX_HEIGHT:
                 self.new_height = MAX_HEIGHT
                 self.resize_tools.aspect_ratio_checkbox.setChecked(False)
-            self.model.actions['Resize'].change_temp_image_height(self.new_height)
             self.resize_tools.height_line_edit.blockSignals(True)
             self.resize_tools.height_line_edit.setText(str(self.new_height))
             self.resize_tools.height_line_edit.blockSignals(False)
 
-        self.model.actions['Resize'].change_temp_image_width(self.new_width)
-        self.new_image()
+        self.request_image()
 
     def change_height(self):
         """Changes the height of the image"""
@@ -106,17 +131,17 @@ class ResizeToolsController(QObject):
             elif self.new_width > MAX_WIDTH:
                 self.new_width = MAX_WIDTH
                 self.resize_tools.aspect_ratio_checkbox.setChecked(False)
-            self.model.actions['Resize'].change_temp_image_width(self.new_width)
             self.resize_tools.width_line_edit.blockSignals(True)
             self.resize_tools.width_line_edit.setText(str(self.new_width))
             self.resize_tools.width_line_edit.blockSignals(False)
 
-        self.model.actions['Resize'].change_temp_image_height(self.new_height)
-        self.new_image()
+        self.request_image()
 
     def display_image_size(self):
-        """Shows the image size in the text elements"""
+        """Shows the image size in the text elements, it is the size requested until
+        one of them changes"""
         image_size = self.model.get_current_image_size()
+        self.new_height, self.new_width = image_size
         self.resize_tools.width_line_edit.setText(str(image_size[1]))
         self.resize_tools.height_line_edit.setText(str(image_size[0]))
 
@@ -130,3 +155,4 @@ class ResizeToolsController(QObject):
         self.resize_tools.width_line_edit.textChanged.connect(self.change_width)
         self.resize_tools.height_line_edit.textChanged.connect(self.change_height)
         self.resize_tools.size_slider.valueChanged.connect(self.slider_value_changed)
+        self.resize_tools.size_slider.sliderReleased.connect(self.change_width)
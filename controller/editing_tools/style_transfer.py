@@ -99,12 +99,17 @@ class StyleTransferButtonContainerController(ButtonContainerController):
                                                 self.model.get_current_image(),))
         self.styled_image_thread.start()
 
-    def styled_image_slot(self):
-        """Method to update the displayed image and join the thread"""
-        self.image_viewer_controller.display_image()
+    def styled_image_slot(self, succeeded: bool):
+        """Method to update the displayed image and join the thread, the editor is
+        unlocked even if the style could not be transferred"""
         self.styled_image_thread.join()
         QApplication.restoreOverrideCursor()
         self.view.tool_bar.setAttribute(Qt.WA_TransparentForMouseEvents, False)
+        if not succeeded:
+            QMessageBox(self.view).information(self.view, 'Information',
+                                               'The style could not be transferred')
+            return
+        self.image_viewer_controller.display_image()
         self.style_transfer_view.accept_and_cancel.accept_action.setEnabled(True)
 
     def connect(self, button: QPushButton):
@@ -1,5 +1,11 @@
 """Image viewer controller module"""
+from typing import Callable, Tuple
+
 from PyQt5.QtCore import pyqtSignal, QObject
+import numpy as np
+
+from model.utils import image_to_pixmap
+from view.image_viewer import IMAGE_TILE_SIZE
 
 
 class ImageViewerController(QObject):
@@ -18,3 +24,33 @@ class ImageViewerController(QObject):
         else:
             self.image_viewer.display_image(get_pixmap())
         self.image_changed.emit()
+
+    def display_image_region(self, get_image_region: Callable, region: tuple):
+        """Displays again only the tiles of the viewer that intersect a region, given a
+        getter of the pixels of a region of the image"""
+        origin_x, origin_y, width, height = region
+        if not (width and height):
+            return
+        first_tile_x = origin_x // IMAGE_TILE_SIZE * IMAGE_TILE_SIZE
+        first_tile_y = origin_y // IMAGE_TILE_SIZE * IMAGE_TILE_SIZE
+        for tile_y in range(first_tile_y, origin_y + height, IMAGE_TILE_SIZE):
+            for tile_x in range(first_tile_x, origin_x + width, IMAGE_TILE_SIZE):
+                tile = get_image_region(tile_x, tile_y, IMAGE_TILE_SIZE, IMAGE_TILE_SIZE)
+                if tile.size:
+                    self.image_viewer.update_image_region(
+                        image_to_pixmap(np.ascontiguousarray(tile)), tile_x, tile_y)
+
+    def display_preview(self):
+        """Displays the preview of the temporary image at the size of the final one"""
+        self.image_viewer.display_image(self.model.get_preview_pixmap(),
+                                        self.model.get_preview_scale())
+        self.image_changed.emit()
+
+    def display_rendered_preview(self, preview: Tuple[np.ndarray, float]):
+        """Displays a preview image and its scale"""
+        self.model.set_preview_image(*preview)
+        self.display_preview()
+
+    def get_viewport_size(self) -> (int, int):
+        """Size of the area where the image is displayed, width and height"""
+        return self.image_viewer.get_viewport_size()
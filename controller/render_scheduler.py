@@ -0,0 +1,110 @@
+"""Render scheduler module"""
+import dataclasses
+import itertools
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+RENDER_DELAY = 20
+
+
+@dataclasses.dataclass
+class RenderRequest:
+    """Render function and the function that publishes its result"""
+    generation: int
+    render: Callable[[], Any]
+    publish: Callable[[Any], None]
+    future: Optional[Future] = None
+
+
+class RenderScheduler(QObject):
+    """Runs the renders of the interactive edits off the GUI thread. The requests that
+    arrive within the delay are coalesced and a request that is superseded before it
+    starts is dropped, so at most one render runs at a time and only the latest one
+    waits. The results are published on the GUI thread, never older than the last one"""
+    def __init__(self, delay: int = RENDER_DELAY):
+        super().__init__()
+        self.delay = delay
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.start_next_render)
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='render')
+        self.generation_counter = itertools.count(1)
+        self.last_generation = 0
+        self.published_generation = 0
+        self.pending_request: Optional[RenderRequest] = None
+        self.running_request: Optional[RenderRequest] = None
+
+        self.render_finished.connect(self.finish_render)
+
+    render_finished = pyqtSignal(object)
+
+    instance: Optional['RenderScheduler'] = None
+
+    @classmethod
+    def get_instance(cls) -> 'RenderScheduler':
+        """Returns the render scheduler shared by all the controllers"""
+        if cls.instance is None:
+            cls.instance = cls()
+        return cls.instance
+
+    def request(self, render: Callable[[], Any], publish: Callable[[Any], None]):
+        """Schedules a render, the previous request is replaced if it has not started.
+        The render starts once the delay since the first request of the burst is over,
+        so a continuous burst still renders every delay"""
+        self.last_generation = next(self.generation_counter)
+        self.pending_request = RenderRequest(self.last_generation, render, publish)
+        if not self.timer.isActive():
+            self.timer.start(self.delay)
+
+    def start_next_render(self):
+        """Starts the pending render in the worker thread if no other one is running"""
+        if self.running_request is not None or self.pending_request is None:
+            return
+        request, self.pending_request = self.pending_request, None
+        self.running_request = request
+        request.future = self.executor.submit(request.render)
+        request.future.add_done_callback(lambda _: self.render_finished.emit(request))
+
+    def finish_render(self, request: RenderRequest):
+        """Publishes a finished render and starts the pending one"""
+        if request is not self.running_request:
+            return
+        self.running_request = None
+        self.publish(request)
+        if not self.timer.isActive():
+            self.start_next_render()
+
+    def publish(self, request: RenderRequest):
+        """Publishes the result of a request, it is rendered here if it was not before"""
+        if request.generation <= self.published_generation:
+            return
+        try:
+            result = request.render() if request.future is None else request.future.result()
+        except Exception as error:
+            print(f'Error: the render could not be completed: {error}')
+            return
+        self.published_generation = request.generation
+        request.publish(result)
+
+    def flush(self):
+        """Publishes the latest request right away, it is used when the result is needed"""
+        self.timer.stop()
+        running_request, self.running_request = self.running_request, None
+        pending_request, self.pending_request = self.pending_request, None
+        if running_request is not None:
+            wait([running_request.future])
+        if pending_request is not None:
+            self.publish(pending_request)
+        elif running_request is not None:
+            self.publish(running_request)
+
+    def cancel(self):
+        """Drops the pending request and the result of the running one"""
+        self.timer.stop()
+        self.pending_request = None
+        self.running_request = None
+        self.published_generation = self.last_generation
+
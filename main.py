@@ -8,7 +8,7 @@ from model import ImageEditor
 
 if __name__ == "__main__":
     from PyQt5.QtWidgets import QApplication
-    from PyQt5.QtCore import pyqtRemoveInputHook
+    from PyQt5.QtCore import pyqtRemoveInputHook, QTimer
     pyqtRemoveInputHook()
     with open('stylesheet.qss', 'r') as file:
         app = QApplication(sys.argv)
@@ -18,4 +18,5 @@ if __name__ == "__main__":
         main_window.show()
         image_editor = ImageEditor()
         MainController(view=main_window, model=image_editor)
+        QTimer.singleShot(0, image_editor.warm_up_tools)
         sys.exit(app.exec())
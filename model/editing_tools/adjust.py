@@ -1,9 +1,10 @@
 """Adjust model file"""
 import dataclasses
+import functools
 from abc import ABC, abstractmethod
-from typing import Optional
+import threading
+from typing import List, Optional, Tuple
 
-from PIL import Image, ImageEnhance
 import cv2
 import numpy as np
 from mypy_extensions import TypedDict
@@ -11,6 +12,13 @@ from mypy_extensions import TypedDict
 from model.editing_tools import EditingToolModel
 
 SLIDER_MAX_VALUE = 100
+LOOKUP_TABLE_CACHE_SIZE = 64
+
+SMOOTH_KERNEL = np.array([[1, 1, 1],
+                          [1, 5, 1],
+                          [1, 1, 1]], np.float32) / 13
+
+IDENTITY_LOOKUP_TABLE = np.arange(256, dtype=np.uint8).reshape((1, 256))
 
 
 class AdjustActionModel(EditingToolModel):
@@ -21,7 +29,9 @@ class AdjustActionModel(EditingToolModel):
 
         self.image_before_editing: np.ndarray = np.zeros((1, 1, 3), np.uint8)
         self.current_edited_image: np.ndarray = np.zeros((1, 1, 3), np.uint8)
-        self.image_before_current_feature_applies: np.ndarray = np.zeros((1, 1, 3), np.uint8)
+        self.stage_cache = StageCache()
+        self.preview_stage_cache = StageCache()
+        self.preview_source: Optional[np.ndarray] = None
 
         self.feature_container = FeatureContainer()
         self.feature_container.append_feature('Brightness', Brightness())
@@ -32,25 +42,53 @@ class AdjustActionModel(EditingToolModel):
     def initialize_features(self):
         """Initializes all the feature changers"""
         self.feature_container.set_all_to_zero()
-        self.image_before_editing = self.image_editor.get_current_image().copy()
-        self.current_edited_image = self.image_editor.get_current_image().copy()
+        self.image_before_editing = self.image_editor.get_current_image()
+        self.current_edited_image = self.image_before_editing
+        self.stage_cache.clear()
+        self.preview_stage_cache.clear()
 
     def get_feature_value(self) -> int:
         """Feature changer value getter"""
         return self.feature_container.current_feature.get_value()
 
-    def change_value(self, value: int):
-        """Changes the value of the current feature changer and it applies it to the image"""
+    def set_feature_value(self, value: int):
+        """Feature changer value setter"""
         self.feature_container.change_current_feature_value(value)
-        self.current_edited_image = \
-            self.feature_container.apply_all_feature_changes(self.image_before_editing.copy())
+
+    def get_features_copy(self) -> List['FeatureStrategy']:
+        """Copies of the features with their current values"""
+        return self.feature_container.get_features_copy()
+
+    def render(self, features: List['FeatureStrategy']) -> np.ndarray:
+        """Applies the given features on the image before editing"""
+        return self.stage_cache.apply(self.image_before_editing, features)
+
+    def render_preview(self, features: List['FeatureStrategy'],
+                       max_width: int, max_height: int) -> Tuple[np.ndarray, float]:
+        """Applies the given features on a proxy of the image that fits in the given size,
+        with the same stages as the final image. The proxy scale is also returned"""
+        proxy_image, scale = self.image_editor.get_proxy_image(max_width, max_height)
+        if proxy_image is not self.preview_source:
+            self.preview_stage_cache.clear()
+            self.preview_source = proxy_image
+        return self.preview_stage_cache.apply(proxy_image, features), scale
+
+    def set_edited_image(self, image: np.ndarray, features: List['FeatureStrategy']):
+        """Sets the result of applying the given features as the temporary image"""
+        self.current_edited_image = image
         self.image_editor.tmp_img = self.current_edited_image
+        self.image_editor.record_temp_operation(
+            functools.partial(apply_features, features=features))
 
     def set_feature(self, feature_name):
-        """Feature changer value setter"""
+        """Feature changer value setter. The stages before the feature are computed,
+        they are reused while only the values of the feature and the next ones change"""
         self.feature_container.set_feature(feature_name)
-        self.image_before_current_feature_applies = \
-            self.feature_container.apply_all_feature_changes(self.image_before_editing.copy())
+        features = self.feature_container.get_features()
+        stages = split_stages(features)
+        current_stage = next(index for index, stage in enumerate(stages)
+                             if self.feature_container.current_feature in stage)
+        self.stage_cache.apply(self.image_before_editing, features, current_stage)
 
 
 @dataclasses.dataclass
@@ -71,48 +109,60 @@ class FeatureStrategy(ABC):
         """Changes the intensity of the feature that is being changed"""
 
 
-class Brightness(FeatureStrategy):
-    """Brightness changer"""
+class PointwiseFeature(FeatureStrategy):
+    """Feature changer that maps every pixel value on its own. Consecutive pointwise
+    features are fused in a single lookup table"""
     def change_image_feature(self, img: np.array):
+        return apply_lookup_table(img, build_lookup_table(((type(self), self.value),)))
+
+    @abstractmethod
+    def change_lookup_table(self, table: np.ndarray) -> np.ndarray:
+        """Applies the feature on a lookup table"""
+
+
+class Brightness(PointwiseFeature):
+    """Brightness changer"""
+    def change_lookup_table(self, table: np.ndarray):
         if self.value != 0:
-            img = cv2.add(img, (int(self.value * 2.55), int(self.value * 2.55),
-                                int(self.value * 2.55), 0))
-        return img
+            table = cv2.add(table, (int(self.value * 2.55), int(self.value * 2.55),
+                                    int(self.value * 2.55), 0))
+        return table
 
 
-class Contrast(FeatureStrategy):
+class Contrast(PointwiseFeature):
     """Contrast changer"""
-    def change_image_feature(self, img: np.array):
+    def change_lookup_table(self, table: np.ndarray):
         contrast = self.value / 2
         if contrast != 0:
             alpha = float(131 * (contrast + 127)) / (127 * (131 - contrast))
             gamma = 127 * (1 - alpha)
 
-            img = cv2.addWeighted(img, alpha,
-                                  img, 0, gamma)
+            table = cv2.addWeighted(table, alpha,
+                                    table, 0, gamma)
 
-        return img
+        return table
 
 
 class Saturation(FeatureStrategy):
-    """Saturation changer"""
+    """Saturation changer, the image is blended with its gray version"""
     def change_image_feature(self, img: np.array):
-        rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(rgb_img)
-        enhancer = ImageEnhance.Color(pil_img)
-        pil_img = enhancer.enhance((self.value + SLIDER_MAX_VALUE) / SLIDER_MAX_VALUE)
-        img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+        factor = (self.value + SLIDER_MAX_VALUE) / SLIDER_MAX_VALUE
+        if factor != 1:
+            gray = cv2.cvtColor(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+            img = cv2.addWeighted(img, factor, gray, 1 - factor, 0)
         return img
 
 
 class Sharpness(FeatureStrategy):
-    """Sharpness changer"""
+    """Sharpness changer, the image is blended with a smoothed version whose border
+    pixels are kept from the original one"""
     def change_image_feature(self, img: np.array):
-        rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(rgb_img)
-        enhancer = ImageEnhance.Sharpness(pil_img)
-        pil_img = enhancer.enhance((self.value + SLIDER_MAX_VALUE) * 2 / SLIDER_MAX_VALUE)
-        img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+        factor = (self.value + SLIDER_MAX_VALUE) * 2 / SLIDER_MAX_VALUE
+        if factor != 1:
+            smooth = cv2.filter2D(img, -1, SMOOTH_KERNEL)
+            smooth[[0, -1]] = img[[0, -1]]
+            smooth[:, [0, -1]] = img[:, [0, -1]]
+            img = cv2.addWeighted(img, factor, smooth, 1 - factor, 0)
         return img
 
 
@@ -151,10 +201,93 @@ class FeatureContainer:
 
     def apply_all_feature_changes(self, img: np.ndarray) -> np.ndarray:
         """All the feature changes will be applied"""
-        for _, feature in self.feature_container_dict.items():
-            img = feature.change_image_feature(img)
-        return img
+        return apply_features(img, self.get_features())
 
     def change_current_feature_value(self, value: int):
         """Changes the value of the current value"""
         self.current_feature.set_value(value)
+
+    def get_features(self) -> List[FeatureStrategy]:
+        """Features in the order they are applied"""
+        return list(self.feature_container_dict.values())
+
+    def get_features_copy(self) -> List[FeatureStrategy]:
+        """Copies of the features with their current values"""
+        return [dataclasses.replace(feature) for feature in self.feature_container_dict.values()]
+
+
+class StageCache:
+    """Output of every stage of the adjust pipeline, keyed by the values of the features
+    of the stage and the ones before it. Only the stages after a changed value are
+    computed again. It can be shared by the GUI thread and a render thread"""
+    def __init__(self):
+        self.outputs: List[Tuple[tuple, np.ndarray]] = []
+        self.lock = threading.RLock()
+
+    def clear(self):
+        """Removes the cached outputs, it must be called when the source image changes"""
+        with self.lock:
+            self.outputs = []
+
+    def apply(self, img: np.ndarray, features: List[FeatureStrategy],
+              last_stage: Optional[int] = None) -> np.ndarray:
+        """Applies the features on an image, up to a given stage if any"""
+        with self.lock:
+            values = ()
+            for index, stage in enumerate(split_stages(features)[:last_stage]):
+                values += tuple(feature.get_value() for feature in stage)
+                if index < len(self.outputs) and self.outputs[index][0] == values:
+                    img = self.outputs[index][1]
+                    continue
+                img = apply_stage(img, stage)
+                del self.outputs[index:]
+                self.outputs.append((values, img))
+            return img
+
+
+def apply_features(img: np.ndarray, features: List[FeatureStrategy]) -> np.ndarray:
+    """Applies the given features on an image"""
+    for stage in split_stages(features):
+        img = apply_stage(img, stage)
+    return img
+
+
+def split_stages(features: List[FeatureStrategy]) -> List[List[FeatureStrategy]]:
+    """Groups the features in stages, the consecutive pointwise features make a single stage"""
+    stages = []
+    for feature in features:
+        if isinstance(feature, PointwiseFeature) and stages and \
+                isinstance(stages[-1][-1], PointwiseFeature):
+            stages[-1].append(feature)
+        else:
+            stages.append([feature])
+    return stages
+
+
+def apply_stage(img: np.ndarray, stage: List[FeatureStrategy]) -> np.ndarray:
+    """Applies a stage on an image, the pointwise features are applied in a single pass"""
+    if isinstance(stage[0], PointwiseFeature):
+        return apply_lookup_table(img, build_lookup_table(
+            tuple((type(feature), feature.get_value()) for feature in stage)))
+    return stage[0].change_image_feature(img)
+
+
+@functools.lru_cache(maxsize=LOOKUP_TABLE_CACHE_SIZE)
+def build_lookup_table(features: Tuple[Tuple[type, int], ...]) -> np.ndarray:
+    """Composes the lookup tables of pointwise features given as (class, value) pairs.
+    The tables are cached, they are only built again when a value changes"""
+    table = IDENTITY_LOOKUP_TABLE
+    for feature_class, value in features:
+        table = feature_class(value).change_lookup_table(table)
+    table.flags.writeable = False
+    return table
+
+
+def apply_lookup_table(img: np.ndarray, table: np.ndarray) -> np.ndarray:
+    """Maps the image through a lookup table, the image is returned as it is
+    if the table does not change any value"""
+    if table is IDENTITY_LOOKUP_TABLE or np.array_equal(table, IDENTITY_LOOKUP_TABLE):
+        return img
+    if img.flags.c_contiguous:
+        return cv2.LUT(img.reshape((img.shape[0], -1)), table).reshape(img.shape)
+    return cv2.LUT(img, table)
@@ -1,4 +1,8 @@
 """Crop model file"""
+import functools
+
+import numpy as np
+
 from .editing_tool import EditingToolModel
 
 
@@ -7,5 +11,11 @@ class CropActionModel(EditingToolModel):
 
     def crop_image(self, origin_x: int, origin_y: int, width: int, height: int):
         """Crops the temporary image"""
-        self.image_editor.tmp_img =\
-            self.image_editor.tmp_img[origin_y:origin_y + height, origin_x:origin_x + width].copy()
+        self.image_editor.apply_temp_operation(functools.partial(crop, origin_x=origin_x,
+                                                                 origin_y=origin_y,
+                                                                 width=width, height=height))
+
+
+def crop(img: np.ndarray, origin_x: int, origin_y: int, width: int, height: int) -> np.ndarray:
+    """Returns a copy of a region of the image"""
+    return img[origin_y:origin_y + height, origin_x:origin_x + width].copy()
@@ -1,25 +1,33 @@
 """Deep dream model file"""
 import dataclasses
+import functools
 import random
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, List, Optional
 import os
 
-import tensorflow as tf
 import cv2
-import numpy as np
 
 from PyQt5.QtCore import pyqtSignal, QObject
 
 from model.editing_tools import EditingToolModel
+from model.model_loader import ModelLoader
+
+DREAM_STEPS = 40
+DREAM_STEP_SIZE = 0.02
+DREAM_FAST_SIZE = 640
+DREAM_OCTAVES = (-2, -1, 0)
+DREAM_OCTAVE_SCALE = 1.3
+DREAM_STEPS_PER_OCTAVE = 15
+
+if TYPE_CHECKING:
+    from .deep_dream_network import DeepDreamNetwork
 
 
 class DeepDreamActionModel(EditingToolModel):
     """Controller of the deep dream action"""
-    def __init__(self, img_editor):
+    def __init__(self, img_editor, dream_size: Optional[int] = None):
         super().__init__(img_editor)
         os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
-        self.base_model = tf.keras.applications.InceptionV3(include_top=False,
-                                                            weights='imagenet')
         self.signal_sender = SignalSender()
         self.deep_dream_layers: Dict[str, list] = \
             {'Curly': ['mixed0'],
@@ -27,41 +35,96 @@ class DeepDreamActionModel(EditingToolModel):
              'Shapes': ['mixed2'],
              'Holes': ['mixed3'],
              'Random': ['mixed5', 'mixed6', 'mixed7', 'mixed9']}
+        self.deep_dream_network = ModelLoader(functools.partial(
+            load_deep_dream_network, cache_size=self.get_dream_models_number()))
+        self.dream_size = dream_size
         self.resized_original_img = None
 
+    def get_dream_models_number(self) -> int:
+        """Number of layer sets the dreams can use, the random dream uses each of its
+        layers on its own"""
+        layer_sets = {tuple(layers) for dream_name, layers in self.deep_dream_layers.items()
+                      if dream_name != 'Random'}
+        layer_sets.update((layer,) for layer in self.deep_dream_layers['Random'])
+        return len(layer_sets)
+
+    def get_dream_size(self) -> Optional[int]:
+        """Dream resolution getter, the longest side of the dreamed image, or None if the
+        image is dreamed at full resolution"""
+        return self.dream_size
+
+    def set_dream_size(self, dream_size: Optional[int]):
+        """Dream resolution setter, None dreams at full resolution. The time of a dream
+        grows with its area, the fast size costs about the same as the previous 500x500
+        dream of 40 steps"""
+        if dream_size is not None and dream_size < 1:
+            print(f'Error: the dream size must be positive, not {dream_size}')
+            return
+        if dream_size != self.dream_size:
+            self.dream_size = dream_size
+            self.resized_original_img = None
+
+    def is_fast_mode(self) -> bool:
+        """Checks if the image is downsized to the fast size before dreaming"""
+        return self.dream_size is not None
+
+    def set_fast_mode(self, fast_mode: bool):
+        """Fast mode setter, the image is dreamed at the fast size and then upscaled"""
+        self.set_dream_size(DREAM_FAST_SIZE if fast_mode else None)
+
     def resize_original_image(self):
-        """Downsizing the image makes it easier to work with"""
+        """Downsizes the image only if it is larger than the dream resolution, it is
+        dreamed at full resolution when there is none"""
         self.resized_original_img = \
             ImageProcessing.resize_img(self.image_editor.get_current_image(),
-                                       max_dim=500)
-
-    def apply_dream(self, dream_name: str):
-        """Apply dream method"""
-        # Maximize the activations of these layers
-        layers = self.select_layers(dream_name)
+                                       max_dim=self.dream_size)
 
-        # Create the feature extraction model
-        dream_model = tf.keras.Model(inputs=self.base_model.input, outputs=layers)
+    def warm_up(self):
+        """Starts loading the deep dream network in the background"""
+        self.deep_dream_network.warm_up()
 
-        deep_dream = DeepDream(dream_model)
-        dream_img = deep_dream.run(img=self.resized_original_img,
-                                   steps=40, step_size=0.02)
-        size = self.image_editor.get_current_image_size()
-        dream_img = cv2.resize(np.array(dream_img),
-                               (size[1], size[0]),
-                               interpolation=cv2.INTER_AREA)
-
-        self.image_editor.tmp_img = dream_img
-        self.signal_sender.deep_dream_finished.emit()
-
-    def select_layers(self, dream_name: str) -> list:
+    def apply_dream(self, dream_name: str):
+        """Apply dream method. The finished signal is always emitted, with whether the
+        dream was applied, since the model is loaded and run in a worker thread"""
+        succeeded = False
+        try:
+            # Maximize the activations of these layers
+            layer_names = self.select_layers(dream_name)
+            if self.resized_original_img is None:
+                self.resize_original_image()
+
+            dream_img = self.deep_dream_network.get_model().dream_octaves(
+                self.resized_original_img, layer_names, octaves=DREAM_OCTAVES,
+                octave_scale=DREAM_OCTAVE_SCALE, steps_per_octave=DREAM_STEPS_PER_OCTAVE,
+                step_size=DREAM_STEP_SIZE)
+            size = self.image_editor.get_current_image_size()
+            if dream_img.shape[:2] != tuple(size[:2]):
+                dream_img = cv2.resize(dream_img,
+                                       (size[1], size[0]),
+                                       interpolation=cv2.INTER_CUBIC)
+
+            self.image_editor.tmp_img = dream_img
+            succeeded = True
+        except Exception as error:
+            print(f'Error: the dream could not be applied: {error}')
+        finally:
+            self.signal_sender.deep_dream_finished.emit(succeeded)
+
+    def select_layers(self, dream_name: str) -> List[str]:
         """Model layers selector"""
         layers: list = self.deep_dream_layers[dream_name]
         if dream_name == 'Random':
             chosen_layers: int = random.randint(0, len(layers) - 1)
-            return [self.base_model.get_layer(layers[chosen_layers]).output]
+            return [layers[chosen_layers]]
+
+        return layers
+
 
-        return [self.base_model.get_layer(layer).output for layer in layers]
+def load_deep_dream_network(cache_size: int) -> 'DeepDreamNetwork':
+    """Imports TensorFlow and loads the InceptionV3 network, it takes several seconds.
+    The network keeps the given number of dream models"""
+    from .deep_dream_network import DeepDreamNetwork
+    return DeepDreamNetwork(cache_size)
 
 
 @dataclasses.dataclass
@@ -70,91 +133,17 @@ class SignalSender(QObject):
     def __init__(self):
         super(QObject, self).__init__()
 
-    deep_dream_finished = pyqtSignal()
+    deep_dream_finished = pyqtSignal(bool)
 
 
 class ImageProcessing:
     """Class that contains useful methods used in the deep dream model"""
     @staticmethod
     def resize_img(img, max_dim=None):
-        """Resize an image"""
-        if max_dim:
-            img = cv2.resize(img, (max_dim, max_dim), interpolation=cv2.INTER_AREA)
+        """Resizes an image so its longest side is not larger than the maximum dimension,
+        keeping its aspect ratio"""
+        if max_dim and max(img.shape[:2]) > max_dim:
+            scale = max_dim / max(img.shape[:2])
+            size = (max(round(img.shape[1] * scale), 1), max(round(img.shape[0] * scale), 1))
+            img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
         return img
-
-    @staticmethod
-    def deprocess(img):
-        """Normalize an image"""
-        img = 255 * (img + 1.0) / 2.0
-        return tf.cast(img, tf.uint8)
-
-
-class DeepDream(tf.Module):
-    """Deep dream model class"""
-    def __init__(self, model):
-        super().__init__()
-        self.model = model
-
-    @tf.function(
-        input_signature=(
-                tf.TensorSpec(shape=[None, None, 3], dtype=tf.float32),
-                tf.TensorSpec(shape=[], dtype=tf.int32),
-                tf.TensorSpec(shape=[], dtype=tf.float32),)
-    )
-    def __call__(self, img, steps, step_size):
-        for _ in tf.range(steps):
-            with tf.GradientTape() as tape:
-                # This needs gradients relative to `img`
-                # `GradientTape` only watches `tf.Variable`s by default
-                tape.watch(img)
-                loss = self.calc_loss(img, self.model)
-
-            # Calculate the gradient of the loss with respect to the pixels of the input image.
-            gradients = tape.gradient(loss, img)
-
-            # Normalize the gradients.
-            gradients /= tf.math.reduce_std(gradients) + 1e-8
-
-            img = img + gradients * step_size
-            img = tf.clip_by_value(img, -1, 1)
-
-        return img
-
-    def run(self, img, steps=100, step_size=0.01):
-        """Runs the model"""
-        img = tf.keras.applications.inception_v3.preprocess_input(img)
-        img = tf.convert_to_tensor(img)
-        step_size = tf.convert_to_tensor(step_size)
-        steps_remaining = steps
-        step = 0
-        while steps_remaining:
-            if steps_remaining > 100:
-                run_steps = tf.constant(100)
-            else:
-                run_steps = tf.constant(steps_remaining)
-            steps_remaining -= run_steps
-            step += run_steps
-
-            img = self(img[:, :, :3], run_steps, tf.constant(step_size))
-
-        result = ImageProcessing.deprocess(img)
-
-        return result
-
-    @staticmethod
-    def calc_loss(img, model):
-        """Loss calculator"""
-
-        # Pass forward the image through the model to retrieve the activations.
-        # Converts the image into a batch of size 1.
-        img_batch = tf.expand_dims(img, axis=0)
-        layer_activations = model(img_batch)
-        if len(layer_activations) == 1:
-            layer_activations = [layer_activations]
-
-        losses = []
-        for act in layer_activations:
-            loss = tf.math.reduce_mean(act)
-            losses.append(loss)
-
-        return tf.reduce_sum(losses)
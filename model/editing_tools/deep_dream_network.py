@@ -0,0 +1,216 @@
+"""Deep dream network file, it imports TensorFlow so it is only loaded when needed"""
+import collections
+import dataclasses
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+import tensorflow as tf
+
+DREAM_MODEL_CACHE_SIZE = 8
+DREAM_TILE_SIZE = 512
+DREAM_MINIMUM_SIZE = 75
+
+
+@dataclasses.dataclass
+class DreamTimings:
+    """Duration of the first step of a dream, which traces its graph if it is new,
+    and the average duration of the following steps, in seconds"""
+    first_step: float
+    per_step: float
+
+
+class DeepDreamNetwork:
+    """InceptionV3 network whose layer activations are maximized by the dreams. The
+    dream models of the last used layers are kept, so their graphs are only traced once.
+    The cache should hold a model for every layer set the dreams use, or it rebuilds them"""
+    def __init__(self, cache_size: int = DREAM_MODEL_CACHE_SIZE):
+        self.base_model = tf.keras.applications.InceptionV3(include_top=False,
+                                                            weights='imagenet')
+        self.cache_size = cache_size
+        self.dream_models: collections.OrderedDict = collections.OrderedDict()
+        self.last_timings: Optional[DreamTimings] = None
+
+    def get_dream_model(self, layer_names: List[str]) -> 'DeepDream':
+        """Returns the dream model of some layers, it is built if it is not cached"""
+        key = tuple(layer_names)
+        if key in self.dream_models:
+            self.dream_models.move_to_end(key)
+            return self.dream_models[key]
+
+        layers = [self.base_model.get_layer(layer_name).output for layer_name in layer_names]
+
+        # Create the feature extraction model
+        dream_model = tf.keras.Model(inputs=self.base_model.input, outputs=layers)
+
+        self.dream_models[key] = DeepDream(dream_model)
+        if len(self.dream_models) > self.cache_size:
+            self.dream_models.popitem(last=False)
+        return self.dream_models[key]
+
+    def dream(self, img: np.ndarray, layer_names: List[str],
+              steps: int, step_size: float) -> np.ndarray:
+        """Maximizes the activations of the layers on the image"""
+        deep_dream = self.get_dream_model(layer_names)
+        dream_img = np.array(deep_dream.run(img=img, steps=steps, step_size=step_size))
+        self.last_timings = deep_dream.timings
+        return dream_img
+
+    def dream_octaves(self, img: np.ndarray, layer_names: List[str], octaves: Sequence[int],
+                      octave_scale: float, steps_per_octave: int, step_size: float,
+                      tile_size: int = DREAM_TILE_SIZE) -> np.ndarray:
+        """Maximizes the activations of the layers on the image at several scales, the last
+        octave is the size of the image. It keeps its aspect ratio and its gradients are
+        computed in tiles, so the memory does not grow with the size of the image"""
+        deep_dream = self.get_dream_model(layer_names)
+        dream_img = np.array(deep_dream.run_octaves(img=img, octaves=octaves,
+                                                    octave_scale=octave_scale,
+                                                    steps_per_octave=steps_per_octave,
+                                                    step_size=step_size, tile_size=tile_size))
+        self.last_timings = deep_dream.timings
+        return dream_img
+
+    def get_last_timings(self) -> Optional[DreamTimings]:
+        """Timings of the last dream"""
+        return self.last_timings
+
+
+def deprocess(img):
+    """Normalize an image"""
+    img = 255 * (img + 1.0) / 2.0
+    return tf.cast(img, tf.uint8)
+
+
+class DeepDream(tf.Module):
+    """Deep dream model class"""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.timings: Optional[DreamTimings] = None
+
+    @tf.function(
+        input_signature=(
+                tf.TensorSpec(shape=[None, None, 3], dtype=tf.float32),
+                tf.TensorSpec(shape=[], dtype=tf.int32),
+                tf.TensorSpec(shape=[], dtype=tf.float32),)
+    )
+    def __call__(self, img, steps, step_size):
+        for _ in tf.range(steps):
+            with tf.GradientTape() as tape:
+                # This needs gradients relative to `img`
+                # `GradientTape` only watches `tf.Variable`s by default
+                tape.watch(img)
+                loss = self.calc_loss(img, self.model)
+
+            # Calculate the gradient of the loss with respect to the pixels of the input image.
+            gradients = tape.gradient(loss, img)
+
+            # Normalize the gradients.
+            gradients /= tf.math.reduce_std(gradients) + 1e-8
+
+            img = img + gradients * step_size
+            img = tf.clip_by_value(img, -1, 1)
+
+        return img
+
+    def run(self, img, steps=100, step_size=0.01):
+        """Runs the model, the first step is timed apart because it traces the graph
+        the first time the model runs"""
+        img = tf.keras.applications.inception_v3.preprocess_input(img)
+        img = tf.convert_to_tensor(img)
+        step_size = tf.convert_to_tensor(step_size)
+
+        start = time.perf_counter()
+        img = self(img[:, :, :3], tf.constant(1), tf.constant(step_size))
+        first_step_end = time.perf_counter()
+
+        steps_remaining = steps - 1
+        while steps_remaining > 0:
+            run_steps = min(steps_remaining, 100)
+            steps_remaining -= run_steps
+
+            img = self(img[:, :, :3], tf.constant(run_steps), tf.constant(step_size))
+
+        self.timings = DreamTimings(first_step=first_step_end - start,
+                                    per_step=(time.perf_counter() - first_step_end)
+                                    / max(steps - 1, 1))
+        result = deprocess(img)
+
+        return result
+
+    @tf.function(
+        input_signature=(
+                tf.TensorSpec(shape=[None, None, 3], dtype=tf.float32),
+                tf.TensorSpec(shape=[2], dtype=tf.int32),
+                tf.TensorSpec(shape=[], dtype=tf.int32),)
+    )
+    def get_tiled_gradients(self, img, shift, tile_size):
+        """Normalized gradients of the loss with respect to the image, computed tile by
+        tile on the image rolled by the shift, so the seams of the tiles move every step"""
+        img_rolled = tf.roll(img, shift=shift, axis=[0, 1])
+        height, width = tf.shape(img_rolled)[0], tf.shape(img_rolled)[1]
+        tile_height = get_tile_length(height, tile_size)
+        tile_width = get_tile_length(width, tile_size)
+
+        gradients = tf.zeros_like(img_rolled)
+        for tile_y in tf.range(0, height, tile_height):
+            for tile_x in tf.range(0, width, tile_width):
+                with tf.GradientTape() as tape:
+                    tape.watch(img_rolled)
+                    img_tile = img_rolled[tile_y:tile_y + tile_height,
+                                          tile_x:tile_x + tile_width]
+                    loss = self.calc_loss(img_tile, self.model)
+                gradients = gradients + tape.gradient(loss, img_rolled)
+
+        gradients = tf.roll(gradients, shift=-shift, axis=[0, 1])
+        return gradients / (tf.math.reduce_std(gradients) + 1e-8)
+
+    def run_octaves(self, img, octaves, octave_scale, steps_per_octave, step_size, tile_size):
+        """Runs the model on the image scaled by every octave, each step shifts the tiles
+        randomly. The first step is timed apart because it traces the graph"""
+        base_size = np.array(img.shape[:2], dtype=float)
+        img = tf.keras.applications.inception_v3.preprocess_input(img)
+        img = tf.convert_to_tensor(img[:, :, :3])
+        random_generator = np.random.default_rng()
+
+        step_durations = []
+        for octave in octaves:
+            octave_size = np.maximum(np.rint(base_size * octave_scale ** octave),
+                                     DREAM_MINIMUM_SIZE).astype(np.int32)
+            img = tf.image.resize(img, octave_size)
+            for _ in range(steps_per_octave):
+                start = time.perf_counter()
+                shift = random_generator.integers(-tile_size, tile_size, size=2, dtype=np.int32)
+                gradients = self.get_tiled_gradients(img, tf.constant(shift),
+                                                     tf.constant(tile_size))
+                img = tf.clip_by_value(img + gradients * step_size, -1, 1)
+                step_durations.append(time.perf_counter() - start)
+
+        if step_durations:
+            self.timings = DreamTimings(first_step=step_durations[0],
+                                        per_step=float(np.mean(step_durations[1:] or [0.0])))
+        return deprocess(img)
+
+    @staticmethod
+    def calc_loss(img, model):
+        """Loss calculator"""
+
+        # Pass forward the image through the model to retrieve the activations.
+        # Converts the image into a batch of size 1.
+        img_batch = tf.expand_dims(img, axis=0)
+        layer_activations = model(img_batch)
+        if len(layer_activations) == 1:
+            layer_activations = [layer_activations]
+
+        losses = []
+        for act in layer_activations:
+            loss = tf.math.reduce_mean(act)
+            losses.append(loss)
+
+        return tf.reduce_sum(losses)
+
+
+def get_tile_length(length, tile_size):
+    """Length of the tiles that split a side evenly in tiles no longer than the tile size"""
+    tiles = (length + tile_size - 1) // tile_size
+    return (length + tiles - 1) // tiles
@@ -1,15 +1,17 @@
 """Draw model file"""
 import dataclasses
-from typing import Optional
+from typing import List, Tuple
 
 import cv2
 import numpy as np
 from PyQt5.QtCore import QPointF
-from PyQt5.QtGui import QColor, QPixmap
+from PyQt5.QtGui import QColor, QPainterPath, QPixmap
 
+from ..image_buffer import TiledImageBuffer, union_regions
 from ..image_filter import ImageFilterContainer
 from ..shape_painter import ShapePainterContainer, RhombusPainter, \
     CirclePainter, SquarePainter, SprayEffect
+from ..stroke import StrokeInterpolator
 from ..utils import image_to_pixmap
 
 from .editing_tool import EditingToolModel
@@ -29,27 +31,27 @@ class DrawActionModel(EditingToolModel):
     def create_new_image_painter(self):
         """Creates an image painter and updates the temporary image"""
         self.image_editor.create_temp_image()
-        self.image_painter.__init__(self.image_editor.tmp_img.copy(),
-                                    np.zeros(self.image_editor.tmp_img.shape, dtype=np.uint8),
+        self.image_painter.__init__(self.image_editor.tmp_img,
+                                    solid_color_image((0, 0, 0), self.image_editor.tmp_img.shape),
                                     self.image_editor.get_current_image())
-        self.image_editor.tmp_img = self.image_painter.images_container.img
+        self.image_editor.tmp_img = self.image_painter.get_edited_image()
 
     def update_image_painter_using_filter(self, filter_name: str):
         """Creates an image painter which uses a filter to paint"""
-        self.image_editor.tmp_img = self.image_painter.images_container.img
+        self.image_editor.tmp_img = self.image_painter.get_edited_image()
         painter_shape: str = self.image_painter.shape_container.get_shape_name()
-        self.image_painter.__init__(self.image_editor.tmp_img.copy(),
+        self.image_painter.__init__(self.image_editor.tmp_img,
                                     self.filter_container.get_filtered_image(filter_name),
                                     self.image_editor.get_current_image())
         self.image_painter.shape_container.set_shape(painter_shape)
 
     def update_image_painter_using_color(self, color: QColor):
         """Creates an image painter which uses a specific colour"""
-        self.image_editor.tmp_img = self.image_painter.images_container.img
-        color_image = np.zeros(self.image_editor.tmp_img.shape, dtype=np.uint8)
-        color_image[:, :] = (color.getRgb()[2], color.getRgb()[1], color.getRgb()[0])
+        self.image_editor.tmp_img = self.image_painter.get_edited_image()
+        color_image = solid_color_image((color.getRgb()[2], color.getRgb()[1], color.getRgb()[0]),
+                                        self.image_editor.tmp_img.shape)
         painter_shape: str = self.image_painter.shape_container.get_shape_name()
-        self.image_painter.__init__(self.image_editor.tmp_img.copy(),
+        self.image_painter.__init__(self.image_editor.tmp_img,
                                     color_image,
                                     self.image_editor.get_current_image())
 
@@ -63,6 +65,15 @@ class DrawActionModel(EditingToolModel):
         """Image container setter"""
         self.filter_container = filter_container
 
+    def set_filters_image(self):
+        """Sets the edited image as the one to filter, the filtered images of the
+        current image are reused while nothing has been painted"""
+        edited_image = self.image_painter.get_edited_image()
+        version = None
+        if edited_image is self.image_editor.get_current_image():
+            version = self.image_editor.get_current_image_version()
+        self.filter_container.set_image(edited_image, version)
+
     def change_brush_size(self, size: int):
         """Changes the size of the painter brush"""
         self.brush_size = size
@@ -73,36 +84,32 @@ class DrawActionModel(EditingToolModel):
         self.image_painter.shape_container.set_size(self.brush_size)
 
 
+def solid_color_image(color: tuple, shape: tuple) -> np.ndarray:
+    """Returns a read-only image of a single colour that does not allocate the whole frame"""
+    return np.broadcast_to(np.array(color, dtype=np.uint8), shape)
+
+
 @dataclasses.dataclass
 class PainterImagesContainer:
     """Class that contains the images that are used in the image painter"""
-    img: np.ndarray
+    img: TiledImageBuffer
     first_img_history: np.ndarray
     edited_image: np.ndarray
-    original_image: Optional[np.ndarray] = None
-
-    def __post_init__(self):
-        self.original_image = self.img.copy()
-
-    def reset_original_image(self):
-        """Substitutes the current image by the original one, without edition"""
-        self.img = self.original_image.copy()
 
 
 class ImagePainter:
     """Handles the actions for editing the image."""
 
     def __init__(self, img, edited_image, first_img_history):
-        self.images_container = PainterImagesContainer(img=img,
+        self.images_container = PainterImagesContainer(img=TiledImageBuffer(img),
                                                        edited_image=edited_image,
                                                        first_img_history=first_img_history)
 
-        self.edited_image_mask = np.zeros((img.shape[0], img.shape[1]), dtype=np.uint8)
-        self.erase_image_mask = np.zeros((img.shape[0], img.shape[1]), dtype=np.uint8)
-        self.cursor_mask = np.zeros((img.shape[0], img.shape[1]), dtype=np.uint8)
-
         self.erase: bool = False
 
+        self.stroke_interpolator = StrokeInterpolator()
+        self.pending_dabs: List[tuple] = []
+
         self.shape_container = ShapePainterContainer()
         self.shape_container.append_painter('Rhombus', RhombusPainter(30))
         self.shape_container.append_painter('Spray', SprayEffect(30))
@@ -110,46 +117,83 @@ class ImagePainter:
         self.shape_container.append_painter('Square', SquarePainter(30))
         self.shape_container.set_shape('Spray')
 
-    def edit_image(self, cursor_pos: QPointF, paint: bool):
-        """Applies the filter in the area if the action is clicking or it draws the cursor
-        if the action is hovering"""
-
-        if paint:
-            mask = self.edited_image_mask
+    def start_stroke(self, cursor_pos: QPointF):
+        """Starts a stroke where the image is pressed"""
+        self.pending_dabs.extend(self.stroke_interpolator.start((cursor_pos.x(),
+                                                                 cursor_pos.y())))
+
+    def continue_stroke(self, cursor_pos: QPointF):
+        """Adds a pointer sample to the stroke, the dabs along the way are painted later"""
+        self.pending_dabs.extend(self.stroke_interpolator.add_sample(
+            (cursor_pos.x(), cursor_pos.y()), self.shape_container.get_size()))
+
+    def paint_stroke(self) -> Tuple[int, int, int, int]:
+        """Paints the pending dabs of the stroke. Returns the region of the image
+        that changed, as origin x, origin y, width and height"""
+        dab_positions, self.pending_dabs = self.pending_dabs, []
+        return self.paint_dabs(dab_positions)
+
+    def paint_dabs(self, center_positions: List[tuple]) -> Tuple[int, int, int, int]:
+        """Applies the filter in the area of the shape drawn at several positions, with
+        a single update of the image"""
+        if not center_positions:
+            return 0, 0, 0, 0
+        shape_mask, region = self.draw_shape_mask(center_positions)
+        self.compose_region(shape_mask, region)
+        return region
+
+    def draw_shape_mask(self, center_positions: List[tuple]) -> Tuple[np.ndarray, tuple]:
+        """Draws the shape at several positions in a mask that only covers their bounding
+        rectangle clipped to the image, the mask and the rectangle are returned"""
+        bounding_rect = (0, 0, 0, 0)
+        for center_position in center_positions:
+            bounding_rect = union_regions(
+                bounding_rect, self.shape_container.get_bounding_rect(center_position))
+        region = self.images_container.img.clip_region(*bounding_rect)
+        origin_x, origin_y, width, height = region
+        shape_mask = np.zeros((height, width), dtype=np.uint8)
+        if shape_mask.size:
+            for center_position in center_positions:
+                self.shape_container.draw_shape(shape_mask, (center_position[0] - origin_x,
+                                                             center_position[1] - origin_y),
+                                                (255, 0, 0))
+        return shape_mask, region
+
+    def compose_region(self, mask: np.ndarray, region: tuple):
+        """Copies the edited image, or the first image of the history when erasing,
+        under the mask in a region of the image. The mask covers only the region"""
+        origin_x, origin_y, width, height = region
+        region_slice = (slice(origin_y, origin_y + height), slice(origin_x, origin_x + width))
+        img_region = self.images_container.img.write_region(*region)
+        if not img_region.size:
+            return
+        if self.erase:
+            cv2.copyTo(self.images_container.first_img_history[region_slice], mask, img_region)
         else:
-            mask = self.cursor_mask
+            cv2.copyTo(self.images_container.edited_image[region_slice], mask, img_region)
 
-        self.shape_container.draw_shape(mask, (int(cursor_pos.x()), int(cursor_pos.y())),
-                                        (255, 0, 0))
+    def get_edited_image(self) -> np.ndarray:
+        """Edited image getter"""
+        return self.images_container.img.get_image()
 
-        cv2.copyTo(self.images_container.edited_image, mask, self.images_container.img)
-        if self.erase:
-            cv2.copyTo(self.images_container.first_img_history, mask, self.images_container.img)
+    def get_edited_region(self, origin_x: int, origin_y: int,
+                          width: int, height: int) -> np.ndarray:
+        """Region of the edited image getter, clipped to the image"""
+        return self.images_container.img.read_region(origin_x, origin_y, width, height)
 
     def get_edited_img_pixmap(self) -> QPixmap:
         """Edited pixmap getter"""
-        return image_to_pixmap(self.images_container.img)
-
-    def remove_cursor(self):
-        """Removes the cursor from the image"""
-        self.images_container.reset_original_image()
-        self.cursor_mask = np.zeros((self.images_container.img.shape[0],
-                                     self.images_container.img.shape[1]),
-                                    dtype=np.uint8)
-        if self.erase:
-            cv2.copyTo(self.images_container.first_img_history,
-                       self.edited_image_mask,
-                       self.images_container.img)
-            return
-        cv2.copyTo(self.images_container.edited_image,
-                   self.edited_image_mask,
-                   self.images_container.img)
+        return image_to_pixmap(self.get_edited_image())
+
+    def get_cursor_outline(self) -> QPainterPath:
+        """Outline of the brush around the origin, it is displayed as the cursor"""
+        return self.shape_container.get_outline()
 
     def activate_eraser(self):
         """Activates the eraser to remove what it was painted"""
         shape_name = self.shape_container.shape_name
         size = self.shape_container.get_size()
-        self.__init__(self.images_container.img,
+        self.__init__(self.get_edited_image(),
                       self.images_container.edited_image,
                       self.images_container.first_img_history)
         self.shape_container.set_shape(shape_name)
@@ -9,3 +9,6 @@ class EditingToolModel:
     """Controller of the cropping action"""
     def __init__(self, img_editor: 'ImageEditor'):
         self.image_editor = img_editor
+
+    def warm_up(self):
+        """Starts loading in the background what the tool needs, if anything"""
@@ -1,5 +1,9 @@
 """Resize model file"""
+import functools
+from typing import Tuple
+
 import cv2
+import numpy as np
 
 from .editing_tool import EditingToolModel
 
@@ -7,17 +11,23 @@ from .editing_tool import EditingToolModel
 class ResizeActionModel(EditingToolModel):
     """Controller of the resize action"""
 
-    def change_temp_image_width(self, width: int):
-        """Change the temporary image width"""
-        self.image_editor.tmp_img = cv2.resize(self.image_editor.get_current_image(),
-                                               (width, self.image_editor.tmp_img.shape[0]),
-                                               cv2.INTER_AREA)
+    def render(self, width: int, height: int) -> np.ndarray:
+        """Returns the current image resized"""
+        return resize(self.image_editor.get_current_image(), width, height)
+
+    def render_preview(self, width: int, height: int,
+                       max_width: int, max_height: int) -> Tuple[np.ndarray, float]:
+        """Returns a proxy of the current image that fits in the given size resized
+        in the same proportion, and the proxy scale"""
+        proxy_image, scale = self.image_editor.get_proxy_image(max_width, max_height)
+        return resize(proxy_image, max(round(width / scale), 1),
+                      max(round(height / scale), 1)), scale
 
-    def change_temp_image_height(self, height: int):
-        """Change the temporary image height"""
-        self.image_editor.tmp_img = cv2.resize(self.image_editor.get_current_image(),
-                                               (self.image_editor.tmp_img.shape[1], height),
-                                               cv2.INTER_AREA)
+    def set_resized_image(self, image: np.ndarray, width: int, height: int):
+        """Sets the current image resized to the given size as the temporary image"""
+        self.image_editor.tmp_img = image
+        self.image_editor.record_temp_operation(
+            functools.partial(resize, width=width, height=height))
 
     def get_size_with_ratio(self, width: int = None, height: int = None):
         """Current image size with ratio getter"""
@@ -29,3 +39,8 @@ class ResizeActionModel(EditingToolModel):
             height = int(current_height * width / current_width)
 
         return width, height
+
+
+def resize(img: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Returns the image resized to the given size"""
+    return cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
@@ -1,4 +1,6 @@
 """Rotation model file"""
+import functools
+
 import cv2
 
 from .editing_tool import EditingToolModel
@@ -10,12 +12,12 @@ class RotationActionModel(EditingToolModel):
     def rotate_temp_image(self, action_text: str):
         """Rotates the temporary image"""
         if action_text == "V":
-            self.image_editor.tmp_img = cv2.flip(self.image_editor.tmp_img, 0)
+            self.image_editor.apply_temp_operation(functools.partial(cv2.flip, flipCode=0))
         elif action_text == "H":
-            self.image_editor.tmp_img = cv2.flip(self.image_editor.tmp_img, 1)
+            self.image_editor.apply_temp_operation(functools.partial(cv2.flip, flipCode=1))
         elif action_text == "L":
-            self.image_editor.tmp_img = cv2.rotate(self.image_editor.tmp_img,
-                                                   cv2.ROTATE_90_COUNTERCLOCKWISE)
+            self.image_editor.apply_temp_operation(
+                functools.partial(cv2.rotate, rotateCode=cv2.ROTATE_90_COUNTERCLOCKWISE))
         elif action_text == "R":
-            self.image_editor.tmp_img = cv2.rotate(self.image_editor.tmp_img,
-                                                   cv2.ROTATE_90_CLOCKWISE)
+            self.image_editor.apply_temp_operation(
+                functools.partial(cv2.rotate, rotateCode=cv2.ROTATE_90_CLOCKWISE))
@@ -1,22 +1,27 @@
 """Style transfer model file"""
 import dataclasses
 import glob
+import hashlib
+import json
 import ntpath
-import shutil
 import os
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
 
 import cv2
 import numpy as np
-import tensorflow as tf
 from PyQt5.QtCore import QObject, pyqtSignal
 from PyQt5.QtGui import QPixmap
 
 from model.editing_tools import EditingToolModel
+from model.model_loader import ModelLoader
 from model.utils import image_to_pixmap
 
+if TYPE_CHECKING:
+    from .style_transfer_network import StyleTransferExecutor
+
 STYLE_IMAGES_PATH = 'model/style_images'
-ML_MODEL_PATH = './model/ML_models/magenta_arbitrary-image-stylization-v1-256_2'
-TMP_PATH = './model/style_images/tmp'
+STYLE_CACHE_PATH = './model/style_images/.cache'
+STYLE_CACHE_INDEX = 'bottlenecks.json'
 
 
 class StyleTransferActionModel(EditingToolModel):
@@ -26,9 +31,11 @@ class StyleTransferActionModel(EditingToolModel):
         super().__init__(img_editor)
         self.styled_images_directories = []
         self.styled_images = {}
+        self.styled_images_paths = {}
         self.styled_images_pixmap = {}
         self.load_styled_images_directory()
-        self.style_transfer_executor = StyleTransferExecutor()
+        self.style_transfer_executor = ModelLoader(load_style_transfer_executor)
+        self.style_bottleneck_cache = StyleBottleneckCache()
         self.signal_sender = SignalSender()
 
     def load_styled_images_directory(self):
@@ -54,6 +61,7 @@ class StyleTransferActionModel(EditingToolModel):
         name = self.path_leaf(directory)
         self.styled_images_pixmap[name] = image_to_pixmap(image)
         self.styled_images[name] = image
+        self.styled_images_paths[name] = directory
 
     def read_all_styled_images(self):
         """Method for reading all the styled images"""
@@ -62,6 +70,7 @@ class StyleTransferActionModel(EditingToolModel):
             name = self.path_leaf(directory)
             self.styled_images_pixmap[name] = image_to_pixmap(image)
             self.styled_images[name] = image
+            self.styled_images_paths[name] = directory
 
     def get_all_filtered_images_pixmap(self) -> dict:
         """Filtered pixmap getter"""
@@ -71,12 +80,30 @@ class StyleTransferActionModel(EditingToolModel):
         """Filtered image pixmap getter"""
         return self.styled_images_pixmap[name]
 
+    def warm_up(self):
+        """Starts loading the style transfer model in the background"""
+        self.style_transfer_executor.warm_up()
+
     def apply_style_transfer(self, style_name: str, image: np.ndarray) -> None:
-        """Apply style transfer"""
-        self.style_transfer_executor.\
-            apply_style_transfer(self.styled_images[style_name], image)
-        self.image_editor.tmp_img = self.style_transfer_executor.stylized_image
-        self.signal_sender.style_transfer_finished.emit()
+        """Apply style transfer. The finished signal is always emitted, with whether the
+        style was transferred, since the model is loaded and run in a worker thread"""
+        succeeded = False
+        try:
+            style_transfer_executor = self.style_transfer_executor.get_model()
+            if style_transfer_executor.is_split():
+                style_bottleneck = self.style_bottleneck_cache.get_style_bottleneck(
+                    self.styled_images_paths[style_name], self.styled_images[style_name],
+                    style_transfer_executor.predict_style_bottleneck)
+                style_transfer_executor.apply_style_transfer(style_bottleneck, image)
+            else:
+                style_transfer_executor.apply_whole_style_transfer(
+                    self.styled_images[style_name], image)
+            self.image_editor.tmp_img = style_transfer_executor.stylized_image
+            succeeded = True
+        except Exception as error:
+            print(f'Error: the style could not be transferred: {error}')
+        finally:
+            self.signal_sender.style_transfer_finished.emit(succeeded)
 
 
 @dataclasses.dataclass
@@ -85,60 +112,75 @@ class SignalSender(QObject):
     def __init__(self):
         super(QObject, self).__init__()
 
-    style_transfer_finished = pyqtSignal()
-
-
-class StyleTransferExecutor:
-    """Class for executing the style transfer"""
-    def __init__(self):
-        self.stylized_image = None
-        self.ml_model = tf.saved_model.load(ML_MODEL_PATH)
-        self.content_image_path = TMP_PATH + '/content_image.jpg'
-        self.style_image_path = TMP_PATH + '/style_image.jpg'
-
-    @staticmethod
-    def scale_image(img, max_dim=512):
-        """Scales the image"""
-        original_shape = tf.cast(tf.shape(img)[:-1], tf.float32)
-        scale_ratio = max_dim / max(original_shape)
-
-        new_shape = tf.cast(original_shape * scale_ratio, tf.int32)
-
-        return tf.image.resize(img, new_shape)
-
-    def load_img(self, path_to_img):
-        """Loads an image given a path"""
-        img = tf.io.read_file(path_to_img)
-        img = tf.image.decode_image(img, channels=3)
-        img = tf.image.convert_image_dtype(img, tf.float32)
-        img = self.scale_image(img)
-
-        return img[tf.newaxis, :]
+    style_transfer_finished = pyqtSignal(bool)
 
-    def apply_style_transfer(self, style_image: np.ndarray, content_image: np.ndarray):
-        """Method for applying style transfer"""
-        if not os.path.exists(TMP_PATH):
-            os.makedirs(TMP_PATH)
 
-        cv2.imwrite(self.content_image_path, content_image)
-        cv2.imwrite(self.style_image_path, style_image)
+def load_style_transfer_executor() -> 'StyleTransferExecutor':
+    """Imports TensorFlow and loads the style transfer model, it takes several seconds"""
+    from .style_transfer_network import StyleTransferExecutor
+    return StyleTransferExecutor()
 
-        size = content_image.shape
 
-        content_image = self.load_img(self.content_image_path)
-        style_image = self.load_img(self.style_image_path)
+class StyleBottleneckCache:
+    """Bottlenecks of the style images, kept in memory and in a directory indexed by the
+    hash of the style files, so the style prediction network only runs once per style"""
+    def __init__(self, cache_path: str = STYLE_CACHE_PATH):
+        self.cache_path = cache_path
+        self.style_bottlenecks: Dict[str, np.ndarray] = {}
+        self.file_hashes: Dict[str, Tuple[Tuple[int, float], str]] = {}
+        self.index = self.read_index()
 
+    def read_index(self) -> dict:
+        """Reads the index of the bottlenecks stored on disk, it is empty if there is none"""
         try:
-            shutil.rmtree(TMP_PATH)
+            with open(os.path.join(self.cache_path, STYLE_CACHE_INDEX)) as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+
+    def get_file_hash(self, path: str) -> str:
+        """Hash of the content of a file, it is computed again only if the file changes"""
+        file_stat = os.stat(path)
+        file_signature = (file_stat.st_size, file_stat.st_mtime)
+        if path not in self.file_hashes or self.file_hashes[path][0] != file_signature:
+            with open(path, 'rb') as style_file:
+                self.file_hashes[path] = (file_signature,
+                                          hashlib.sha1(style_file.read()).hexdigest())
+        return self.file_hashes[path][1]
+
+    def get_style_bottleneck(self, path: str, style_image: np.ndarray,
+                             predict_bottleneck: Callable) -> np.ndarray:
+        """Returns the bottleneck of a style image, it is predicted only if it is neither
+        in memory nor on disk"""
+        file_hash = self.get_file_hash(path)
+        if file_hash not in self.style_bottlenecks:
+            style_bottleneck = self.read_style_bottleneck(file_hash)
+            if style_bottleneck is None:
+                style_bottleneck = np.asarray(predict_bottleneck(style_image))
+                self.write_style_bottleneck(file_hash, style_bottleneck, path)
+            self.style_bottlenecks[file_hash] = style_bottleneck
+        return self.style_bottlenecks[file_hash]
+
+    def read_style_bottleneck(self, file_hash: str) -> Optional[np.ndarray]:
+        """Reads a bottleneck from disk if it is in the index"""
+        if file_hash not in self.index:
+            return None
+        try:
+            return np.load(os.path.join(self.cache_path, self.index[file_hash]['file']))
+        except (OSError, ValueError) as error:
+            print(f'Error: the cached style {file_hash} could not be read: {error}')
+            return None
+
+    def write_style_bottleneck(self, file_hash: str, style_bottleneck: np.ndarray, path: str):
+        """Stores a bottleneck on disk and adds it to the index"""
+        file_name = f'{file_hash}-bottleneck.npy'
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+            np.save(os.path.join(self.cache_path, file_name), style_bottleneck)
+            self.index[file_hash] = {'file': file_name, 'style': os.path.basename(path)}
+            index_path = os.path.join(self.cache_path, STYLE_CACHE_INDEX)
+            with open(index_path + '.tmp', 'w') as index_file:
+                json.dump(self.index, index_file, indent=1)
+            os.replace(index_path + '.tmp', index_path)
         except OSError as error:
-            print("Error: %s : %s" % (TMP_PATH, error.strerror))
-
-        self.stylized_image = self.ml_model(tf.constant(content_image),
-                                            tf.constant(style_image))[0]
-
-        self.stylized_image = cv2.cvtColor(self.stylized_image.numpy()[0],
-                                           cv2.COLOR_RGB2BGR)
-        self.stylized_image = cv2.normalize(self.stylized_image,
-                                            None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
-        self.stylized_image = cv2.resize(self.stylized_image, (size[1], size[0]),
-                                         cv2.INTER_AREA)
+            print(f'Error: {self.cache_path} : {error.strerror}')
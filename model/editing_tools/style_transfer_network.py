@@ -0,0 +1,102 @@
+"""Style transfer network file, it imports TensorFlow so it is only loaded when needed"""
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+import tensorflow as tf
+
+ML_MODEL_PATH = './model/ML_models/magenta_arbitrary-image-stylization-v1-256_2'
+STYLE_BOTTLENECK_TENSOR = 'bottleneck/Mean:0'
+
+
+class StyleTransferExecutor:
+    """Class for executing the style transfer. The model is split in the style prediction
+    network, which turns a style image into its bottleneck, and the transformer network,
+    so the bottleneck of a style can be computed once and reused. If the model cannot be
+    split, the whole model runs with the style image every time"""
+    def __init__(self):
+        self.stylized_image = None
+        self.ml_model = tf.saved_model.load(ML_MODEL_PATH)
+        self.style_predictor: Optional[Callable] = None
+        self.transformer: Optional[Callable] = None
+        try:
+            self.style_predictor, self.transformer = split_style_model(self.ml_model.__call__)
+        except (AttributeError, KeyError, ValueError, TypeError, tf.errors.OpError) as error:
+            print(f'Error: the style model could not be split, '
+                  f'the whole model runs for every style: {error}')
+
+    def is_split(self) -> bool:
+        """Checks if the style bottleneck can be predicted on its own"""
+        return self.style_predictor is not None
+
+    @staticmethod
+    def scale_image(img, max_dim=512):
+        """Scales the image"""
+        original_shape = tf.cast(tf.shape(img)[:-1], tf.float32)
+        scale_ratio = max_dim / max(original_shape)
+
+        new_shape = tf.cast(original_shape * scale_ratio, tf.int32)
+
+        return tf.image.resize(img, new_shape)
+
+    def load_img(self, img: np.ndarray):
+        """Converts a BGR image into the scaled batch of RGB floats the model takes"""
+        img = tf.constant(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        img = tf.image.convert_image_dtype(img, tf.float32)
+        img = self.scale_image(img)
+
+        return img[tf.newaxis, :]
+
+    def predict_style_bottleneck(self, style_image: np.ndarray) -> np.ndarray:
+        """Runs the style prediction network on a BGR style image"""
+        return self.style_predictor(self.load_img(style_image)).numpy()
+
+    def apply_style_transfer(self, style_bottleneck: np.ndarray, content_image: np.ndarray):
+        """Method for applying style transfer, only the transformer network runs"""
+        self.stylized_image = self.stylize(self.load_img(content_image), style_bottleneck,
+                                           content_image.shape)
+
+    def apply_whole_style_transfer(self, style_image: np.ndarray, content_image: np.ndarray):
+        """Method for applying style transfer with the whole model, from the style image"""
+        stylized_image = self.ml_model(self.load_img(content_image),
+                                       self.load_img(style_image))[0]
+        self.stylized_image = postprocess(stylized_image, content_image.shape)
+
+    def stylize(self, content_image, style_bottleneck, size: tuple) -> np.ndarray:
+        """Runs the transformer network and converts its output to a BGR image of the
+        given size"""
+        stylized_image = self.transformer(tf.constant(content_image),
+                                          tf.constant(style_bottleneck))
+        return postprocess(stylized_image, size)
+
+
+def postprocess(stylized_image, size: tuple) -> np.ndarray:
+    """Converts a batch of RGB floats into a BGR image of the given size"""
+    stylized_image = cv2.cvtColor(stylized_image.numpy()[0], cv2.COLOR_RGB2BGR)
+    stylized_image = cv2.normalize(stylized_image, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+    return cv2.resize(stylized_image, (size[1], size[0]), interpolation=cv2.INTER_AREA)
+
+
+def split_style_model(serving_function) -> Tuple[Callable, Callable]:
+    """Prunes the serving function of the model, which takes the content and the style
+    images, into the style prediction function, from the style image to its bottleneck,
+    and the transformer function, from the content image and a bottleneck. The graph of
+    the function is imported with its variables mapped to the ones of the loaded model"""
+    graph_def = serving_function.graph.as_graph_def()
+    content_input, style_input = [tensor.name for tensor in serving_function.inputs[:2]]
+    variable_inputs = [tensor.name for tensor in serving_function.inputs[2:]]
+
+    def import_model():
+        tf.compat.v1.import_graph_def(
+            graph_def, name='',
+            input_map={name: tf.identity(variable) for name, variable
+                       in zip(variable_inputs, serving_function.captured_inputs)})
+
+    model_function = tf.compat.v1.wrap_function(import_model, [])
+    get_tensor = model_function.graph.get_tensor_by_name
+    bottleneck = get_tensor(STYLE_BOTTLENECK_TENSOR)
+
+    style_predictor = model_function.prune(feeds=[get_tensor(style_input)], fetches=bottleneck)
+    transformer = model_function.prune(feeds=[get_tensor(content_input), bottleneck],
+                                       fetches=get_tensor(serving_function.outputs[0].name))
+    return style_predictor, transformer
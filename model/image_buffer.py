@@ -0,0 +1,86 @@
+"""Image buffer model file"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .image_history import TILE_SIZE
+
+
+class TiledImageBuffer:
+    """Copy-on-write image made of fixed-size tiles. The pixels are shared with a source
+    image until a region is written, then only the tiles of that region are duplicated"""
+    def __init__(self, source: np.ndarray, tile_size: int = TILE_SIZE):
+        self.source = source
+        self.tile_size = tile_size
+        self.image: Optional[np.ndarray] = None
+
+        rows = -(-source.shape[0] // tile_size)
+        columns = -(-source.shape[1] // tile_size)
+        self.copied_tiles = np.zeros((rows, columns), dtype=bool)
+
+    def get_shape(self) -> tuple:
+        """Image shape getter"""
+        return self.source.shape
+
+    def clip_region(self, origin_x: int, origin_y: int,
+                    width: int, height: int) -> Tuple[int, int, int, int]:
+        """Clips a region to the image boundaries"""
+        end_x = min(max(origin_x + width, 0), self.source.shape[1])
+        end_y = min(max(origin_y + height, 0), self.source.shape[0])
+        origin_x = min(max(origin_x, 0), end_x)
+        origin_y = min(max(origin_y, 0), end_y)
+        return origin_x, origin_y, end_x - origin_x, end_y - origin_y
+
+    def copy_tiles(self, origin_x: int, origin_y: int, width: int, height: int):
+        """Duplicates the tiles of a region that are still shared with the source"""
+        if self.image is None:
+            self.image = np.empty_like(self.source)
+        first_row, first_column = origin_y // self.tile_size, origin_x // self.tile_size
+        last_row = (origin_y + height - 1) // self.tile_size
+        last_column = (origin_x + width - 1) // self.tile_size
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                if not self.copied_tiles[row, column]:
+                    tile_slice = (slice(row * self.tile_size, (row + 1) * self.tile_size),
+                                  slice(column * self.tile_size, (column + 1) * self.tile_size))
+                    self.image[tile_slice] = self.source[tile_slice]
+                    self.copied_tiles[row, column] = True
+
+    def read_region(self, origin_x: int, origin_y: int, width: int, height: int) -> np.ndarray:
+        """Returns a read-only view of a region"""
+        origin_x, origin_y, width, height = self.clip_region(origin_x, origin_y, width, height)
+        region = (slice(origin_y, origin_y + height), slice(origin_x, origin_x + width))
+        if self.image is None or not (width and height):
+            return self.source[region]
+        self.copy_tiles(origin_x, origin_y, width, height)
+        return self.image[region]
+
+    def write_region(self, origin_x: int, origin_y: int, width: int, height: int) -> np.ndarray:
+        """Returns a writable view of a region, only its tiles are duplicated"""
+        origin_x, origin_y, width, height = self.clip_region(origin_x, origin_y, width, height)
+        if not (width and height):
+            return np.empty((0, 0) + self.source.shape[2:], dtype=self.source.dtype)
+        self.copy_tiles(origin_x, origin_y, width, height)
+        return self.image[origin_y:origin_y + height, origin_x:origin_x + width]
+
+    def get_image(self) -> np.ndarray:
+        """Returns the whole image, the source itself if nothing was written"""
+        if self.image is None:
+            return self.source
+        if not self.copied_tiles.all():
+            self.copy_tiles(0, 0, self.source.shape[1], self.source.shape[0])
+        return self.image
+
+
+def union_regions(first_region: Tuple[int, int, int, int],
+                  second_region: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """Smallest region that contains two regions, the empty regions are ignored"""
+    if not (first_region[2] and first_region[3]):
+        return second_region
+    if not (second_region[2] and second_region[3]):
+        return first_region
+    origin_x = min(first_region[0], second_region[0])
+    origin_y = min(first_region[1], second_region[1])
+    end_x = max(first_region[0] + first_region[2], second_region[0] + second_region[2])
+    end_y = max(first_region[1] + first_region[3], second_region[1] + second_region[3])
+    return origin_x, origin_y, end_x - origin_x, end_y - origin_y
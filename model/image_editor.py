@@ -1,4 +1,6 @@
 """Image editor logic"""
+from typing import Callable, List, Optional, Tuple
+
 from PyQt5.QtGui import QPixmap
 import numpy as np
 import cv2
@@ -6,6 +8,7 @@ import cv2
 from .editing_tools import CropActionModel, ResizeActionModel, \
     RotationActionModel, FilterActionModel, DrawActionModel, \
     AdjustActionModel, StyleTransferActionModel, DeepDreamActionModel
+from .image_history import ImageHistory
 from .utils import image_to_pixmap
 
 from .image_filter import ImageFilterContainer, SketchFilter, \
@@ -15,10 +18,17 @@ from .image_filter import ImageFilterContainer, SketchFilter, \
 class ImageEditor:
     """Handles the actions for editing the image."""
     def __init__(self):
-        self.history_img = []
-        self.idx_current_img = 0
+        self.history_img = ImageHistory()
 
         self.tmp_img = np.zeros((1, 1, 3), np.uint8)
+        self.temp_operations: List[Callable] = []
+        self.temp_operations_image: Optional[np.ndarray] = None
+
+        self.proxy_image: Optional[np.ndarray] = None
+        self.proxy_key: Optional[tuple] = None
+        self.proxy_scale = 1.0
+        self.preview_img = np.zeros((1, 1, 3), np.uint8)
+        self.preview_scale = 1.0
 
         filter_container = ImageFilterContainer()
         filter_container.append(SketchFilter())
@@ -50,11 +60,14 @@ class ImageEditor:
     def __bool__(self):
         return bool(self.history_img)
 
+    def warm_up_tools(self):
+        """Starts loading the models of the tools in the background"""
+        for action in self.actions.values():
+            action.warm_up()
+
     def load_image(self, file_path: str):
         """Loads a new image"""
-        self.idx_current_img = 0
-        self.history_img.clear()
-        self.history_img.append(cv2.imread(file_path))
+        self.history_img.reset(cv2.imread(file_path))
 
     def save_image_as(self, file_path: str):
         """Saves the image"""
@@ -62,27 +75,47 @@ class ImageEditor:
 
     def insert_new_image(self):
         """Inserts a new image in the history"""
-        if self.idx_current_img == len(self.history_img) - 1:
-            self.history_img.append(self.tmp_img)
-            self.idx_current_img += 1
-            return
-        self.idx_current_img += 1
-        self.history_img[self.idx_current_img] = self.tmp_img
-        del self.history_img[self.idx_current_img+1:]
+        operations = None
+        if self.temp_operations_image is self.tmp_img:
+            operations = self.temp_operations
+        self.history_img.insert(self.tmp_img, operations)
 
     def undo_image(self):
         """Undoes the image from the history"""
-        if self.idx_current_img > 0:
-            self.idx_current_img -= 1
+        self.history_img.undo()
 
     def redo_image(self):
         """Redoes the image from the history"""
-        if self.idx_current_img < len(self.history_img) - 1:
-            self.idx_current_img += 1
+        self.history_img.redo()
+
+    def set_history_memory_budget(self, memory_budget: int):
+        """History memory budget setter, in bytes"""
+        self.history_img.set_memory_budget(memory_budget)
+
+    def set_history_disk_budget(self, disk_budget: int):
+        """History disk budget setter, in bytes"""
+        self.history_img.set_disk_budget(disk_budget)
 
     def create_temp_image(self):
         """Creates a temporary image"""
         self.tmp_img = self.get_current_image()
+        self.temp_operations = []
+        self.temp_operations_image = self.tmp_img
+
+    def apply_temp_operation(self, operation: Callable[[np.ndarray], np.ndarray]):
+        """Applies an operation on the temporary image and records it, so the history
+        can store the operation instead of the pixels"""
+        chained = self.temp_operations_image is self.tmp_img
+        self.tmp_img = operation(self.tmp_img)
+        if chained:
+            self.temp_operations.append(operation)
+            self.temp_operations_image = self.tmp_img
+
+    def record_temp_operation(self, operation: Callable[[np.ndarray], np.ndarray]):
+        """Records that the temporary image is the result of an operation applied
+        on the current image"""
+        self.temp_operations = [operation]
+        self.temp_operations_image = self.tmp_img
 
     def set_temp_image(self, image: np.ndarray):
         """Temporary setter"""
@@ -97,13 +130,45 @@ class ImageEditor:
         """Temporary pixmap getter"""
         return image_to_pixmap(self.tmp_img)
 
+    def get_proxy_image(self, max_width: int, max_height: int) -> Tuple[np.ndarray, float]:
+        """Current image downsampled to fit in the given size and the scale from the proxy
+        to the current image. The proxy is computed again only if the image changes"""
+        key = (self.get_current_image_version(), max_width, max_height)
+        if key != self.proxy_key:
+            height, width = self.get_current_image_size()
+            scale_ratio = min(max_width / width, max_height / height, 1)
+            self.proxy_image = cv2.resize(self.get_current_image(),
+                                          (max(round(width * scale_ratio), 1),
+                                           max(round(height * scale_ratio), 1)),
+                                          interpolation=cv2.INTER_AREA)
+            self.proxy_scale = width / self.proxy_image.shape[1]
+            self.proxy_key = key
+        return self.proxy_image, self.proxy_scale
+
+    def set_preview_image(self, image: np.ndarray, scale: float):
+        """Preview setter, the image is displayed enlarged by the scale"""
+        self.preview_img = image
+        self.preview_scale = scale
+
+    def get_preview_pixmap(self) -> QPixmap:
+        """Preview pixmap getter"""
+        return image_to_pixmap(self.preview_img)
+
+    def get_preview_scale(self) -> float:
+        """Preview scale getter"""
+        return self.preview_scale
+
     def get_current_image(self) -> np.ndarray:
         """Current image getter"""
-        return self.history_img[self.idx_current_img]
+        return self.history_img.get_current_image()
+
+    def get_current_image_version(self) -> Optional[int]:
+        """Identifier that changes whenever the current image changes"""
+        return self.history_img.get_current_version()
 
     def set_current_image(self, image: np.ndarray) -> None:
         """Current image setter"""
-        self.history_img[self.idx_current_img] = image
+        self.history_img.replace_current_image(image)
 
     def get_current_pixmap(self) -> QPixmap:
         """Current pixmap getter"""
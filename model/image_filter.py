@@ -1,10 +1,96 @@
 """Image filters"""
+import dataclasses
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QPixmap
 import cv2
 import numpy as np
 
 from .utils import image_to_pixmap
 
+PREVIEW_SIZE = 80
+FILTER_WORKERS = os.cpu_count() or 1
+
+CARTOON_QUALITY = 'balanced'
+
+SHARPEN_KERNEL = np.array([[-1, -1, -1],
+                           [-1, 9, -1],
+                           [-1, -1, -1]])
+
+
+@dataclasses.dataclass
+class FilterStage:
+    """Named intermediate image computed from other stages"""
+    name: str
+    dependencies: Tuple[str, ...]
+    function: Callable
+
+
+@dataclasses.dataclass
+class CartoonSettings:
+    """Smoothing configuration of the cartoon filter"""
+    pyramid_levels: int
+    passes: int
+    diameter: int
+    sigma_color: float
+    sigma_space: float
+
+
+CARTOON_QUALITIES = {'high': CartoonSettings(pyramid_levels=1, passes=22, diameter=9,
+                                             sigma_color=9, sigma_space=7),
+                     'balanced': CartoonSettings(pyramid_levels=1, passes=6, diameter=9,
+                                                 sigma_color=15, sigma_space=7)}
+
+
+class FilterStages:
+    """Intermediate images shared by the filters of the same source image.
+    Every stage is computed once, the first time a filter needs it"""
+    stage_graph: Dict[str, FilterStage] = {}
+
+    def __init__(self, image: np.ndarray):
+        self.stages: Dict[str, np.ndarray] = {'image': image}
+        self.stage_locks: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def add_stage(cls, stage: FilterStage):
+        """Declares a stage in the graph shared by all the filters"""
+        cls.stage_graph[stage.name] = stage
+
+    def get_stage(self, stage_name: str) -> np.ndarray:
+        """Stage getter, the stage and its dependencies are computed if they were not
+        before. A stage requested from several threads is computed only by one of them"""
+        with self.lock:
+            stage_lock = self.stage_locks.setdefault(stage_name, threading.Lock())
+        with stage_lock:
+            if stage_name not in self.stages:
+                stage = self.stage_graph[stage_name]
+                self.stages[stage_name] = stage.function(
+                    *[self.get_stage(dependency) for dependency in stage.dependencies])
+            return self.stages[stage_name]
+
+
+FilterStages.add_stage(FilterStage(
+    'gray', ('image',), lambda image: cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)))
+FilterStages.add_stage(FilterStage(
+    'sharpened', ('image',), lambda image: cv2.filter2D(image, -1, SHARPEN_KERNEL)))
+FilterStages.add_stage(FilterStage(
+    'sharpened_gray', ('sharpened',), lambda sharpened: cv2.cvtColor(sharpened,
+                                                                     cv2.COLOR_BGR2GRAY)))
+FilterStages.add_stage(FilterStage(
+    'blurred_inverse', ('sharpened_gray',),
+    lambda sharpened_gray: cv2.GaussianBlur(255 - sharpened_gray, (11, 11), 0)))
+FilterStages.add_stage(FilterStage(
+    'edges', ('sharpened_gray', 'blurred_inverse'),
+    lambda sharpened_gray, blurred_inverse: cv2.cvtColor(
+        cv2.divide(sharpened_gray, 255 - blurred_inverse, scale=256), cv2.COLOR_GRAY2RGB)))
+
 
 class ImageFilter(ABC):
     """Abstract class of the filters"""
@@ -15,43 +101,170 @@ class ImageFilter(ABC):
         """Filter name getter"""
         return self.filter_name
 
-    @abstractmethod
     def apply_filter(self, image: np.ndarray) -> np.ndarray:
         """Applies the filter on a given image"""
+        return self.apply_stages(FilterStages(image))
+
+    @abstractmethod
+    def apply_stages(self, stages: FilterStages) -> np.ndarray:
+        """Applies the filter using the shared intermediate images of the source image"""
 
 
 class ImageFilterContainer:
-    """Filtered image container"""
-    def __init__(self):
-        self.filter_functions = {}
-        self.filtered_images = {}
-        self.pixmap_filtered_images = {}
+    """Filtered image container. The filters run in a thread pool, OpenCV releases the GIL
+    so they are spread across the cores. Every filtered image is computed the first time
+    it is requested and kept while the image version does not change, the stages they
+    have in common are computed once. The previews are filtered from a thumbnail of the
+    image and announced one by one as they finish"""
+    def __init__(self, preview_size: int = PREVIEW_SIZE, max_workers: int = FILTER_WORKERS):
+        self.filter_functions: Dict[str, Callable] = {}
+        self.filtered_images: Dict[str, Future] = {}
+        self.preview_images: Dict[str, Future] = {}
+        self.pixmap_preview_images = {}
+        self.filter_timings: Dict[str, float] = {}
+        self.preview_timings: Dict[str, float] = {}
+        self.source_image: Optional[np.ndarray] = None
+        self.source_stages: Optional[FilterStages] = None
+        self.source_version: Optional[int] = None
+        self.generation = 0
+        self.preview_size = preview_size
+        self.preview_image: Optional[np.ndarray] = None
+        self.preview_stages: Optional[FilterStages] = None
+
+        self.lock = threading.Lock()
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='image-filter')
+        self.signal_sender = SignalSender()
 
     def __len__(self):
         return len(self.filter_functions)
 
     def append(self, image_filter: ImageFilter):
         """Appends a filter to the container"""
-        self.filter_functions[image_filter.get_filter_name()] = image_filter.apply_filter
+        self.filter_functions[image_filter.get_filter_name()] = image_filter.apply_stages
+
+    def get_filter_names(self) -> List[str]:
+        """Names of the filters, in the order they were appended"""
+        return list(self.filter_functions)
+
+    def get_filter_index(self, filter_name: str) -> int:
+        """Position of a filter in the container"""
+        return self.get_filter_names().index(filter_name)
+
+    def set_max_workers(self, max_workers: int):
+        """Number of threads of the pool setter, the running filters are not interrupted"""
+        self.executor.shutdown(wait=False)
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='image-filter')
 
-    def apply_filters(self, image: np.ndarray):
-        """Applies all the filters on a given image"""
-        for name, function in self.filter_functions.items():
-            self.filtered_images[name] = function(image)
+    def get_filter_timings(self) -> Dict[str, float]:
+        """Seconds taken by the last full resolution run of every filter"""
+        return dict(self.filter_timings)
+
+    def get_preview_timings(self) -> Dict[str, float]:
+        """Seconds taken by the last preview run of every filter"""
+        return dict(self.preview_timings)
+
+    def set_image(self, image: np.ndarray, version: Optional[int] = None):
+        """Sets the image to filter. The filtered images are kept if the version is the
+        same as the previous one, an image without version is always filtered again"""
+        with self.lock:
+            if version is None or version != self.source_version:
+                for future in [*self.filtered_images.values(), *self.preview_images.values()]:
+                    future.cancel()
+                self.filtered_images = {}
+                self.preview_images = {}
+                self.pixmap_preview_images = {}
+                self.preview_image = None
+                self.preview_stages = None
+                self.source_stages = FilterStages(image)
+                self.generation += 1
+            self.source_image = image
+            self.source_version = version
+
+    def apply_filters(self, image: np.ndarray, version: Optional[int] = None):
+        """Applies all the filters on a given image, the results are waited for"""
+        self.set_image(image, version)
+        futures = [self.submit_filter(name) for name in self.filter_functions]
+        for future in futures:
+            future.result()
+
+    def submit_filter(self, filter_name: str) -> Future:
+        """Schedules a filter on the full resolution image if it was not before"""
+        with self.lock:
+            if filter_name not in self.filtered_images:
+                self.filtered_images[filter_name] = self.executor.submit(
+                    run_filter, self.filter_functions[filter_name], self.source_stages,
+                    self.filter_timings, filter_name)
+            return self.filtered_images[filter_name]
 
     def get_filtered_image(self, filter_name: str) -> np.ndarray:
-        """Filtered image getter"""
+        """Filtered image getter, the filter is applied if it was not before"""
         try:
-            return self.filtered_images[filter_name]
+            return self.submit_filter(filter_name).result()
         except KeyError as err:
             print(f'There is no filter with name {err}')
             return np.zeros((1, 1, 3), np.uint8)
 
-    def get_filtered_images_pixmap(self) -> dict:
-        """Filtered pixmap getter"""
-        for filter_name, filtered_image in self.filtered_images.items():
-            self.pixmap_filtered_images[filter_name] = image_to_pixmap(filtered_image)
-        return self.pixmap_filtered_images
+    def get_preview_image(self) -> np.ndarray:
+        """Thumbnail of the image, downsampled once to the preview size"""
+        if self.preview_image is None:
+            height, width = self.source_image.shape[:2]
+            scale_ratio = min(self.preview_size / max(height, width), 1)
+            self.preview_image = cv2.resize(self.source_image,
+                                            (max(int(width * scale_ratio), 1),
+                                             max(int(height * scale_ratio), 1)),
+                                            interpolation=cv2.INTER_AREA)
+        return self.preview_image
+
+    def request_previews(self):
+        """Filters the thumbnail in the pool. The signal preview_filtered is emitted with
+        the filter name as every preview finishes, the finished ones are emitted at once"""
+        with self.lock:
+            generation = self.generation
+            if self.preview_stages is None:
+                self.preview_stages = FilterStages(self.get_preview_image())
+            for filter_name, function in self.filter_functions.items():
+                if filter_name not in self.preview_images:
+                    self.preview_images[filter_name] = self.executor.submit(
+                        run_filter, function, self.preview_stages,
+                        self.preview_timings, filter_name)
+            preview_images = dict(self.preview_images)
+
+        for filter_name, future in preview_images.items():
+            future.add_done_callback(
+                lambda done, name=filter_name: self.preview_finished(done, name, generation))
+
+    def preview_finished(self, future: Future, filter_name: str, generation: int):
+        """Announces a preview if it belongs to the current image"""
+        if not future.cancelled() and generation == self.generation:
+            self.signal_sender.preview_filtered.emit(filter_name)
+
+    def get_preview_pixmap(self, filter_name: str) -> Optional[QPixmap]:
+        """Pixmap of a finished preview, it must be called from the GUI thread.
+        None is returned if the preview is not available anymore"""
+        if filter_name not in self.pixmap_preview_images:
+            future = self.preview_images.get(filter_name)
+            if future is None or not future.done() or future.cancelled():
+                return None
+            self.pixmap_preview_images[filter_name] = image_to_pixmap(future.result())
+        return self.pixmap_preview_images[filter_name]
+
+
+class SignalSender(QObject):
+    """Class for sending signals of the filters"""
+    preview_filtered = pyqtSignal(str)
+
+
+def run_filter(function: Callable, stages: FilterStages,
+               timings: Dict[str, float], filter_name: str) -> np.ndarray:
+    """Applies a filter and stores the time it took"""
+    start = time.perf_counter()
+    filtered_image = function(stages)
+    timings[filter_name] = time.perf_counter() - start
+    return filtered_image
 
 
 class ColormapFilter(ImageFilter):
@@ -60,10 +273,9 @@ class ColormapFilter(ImageFilter):
         super().__init__(filter_name)
         self.colormap = colormap
 
-    def apply_filter(self, image: np.ndarray) -> np.ndarray:
+    def apply_stages(self, stages: FilterStages) -> np.ndarray:
         """Returns an image after applying a colormap"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        return cv2.applyColorMap(gray, self.colormap)
+        return cv2.applyColorMap(stages.get_stage('gray'), self.colormap)
 
 
 class SketchFilter(ImageFilter):
@@ -71,41 +283,49 @@ class SketchFilter(ImageFilter):
     def __init__(self):
         super().__init__('SKETCH')
 
-    def apply_filter(self, image: np.ndarray) -> np.ndarray:
+    def apply_stages(self, stages: FilterStages) -> np.ndarray:
         """Returns the sketch effect of images."""
-        kernel = np.array([[-1, -1, -1],
-                           [-1, 9, -1],
-                           [-1, -1, -1]])
-        sharpen_img = cv2.filter2D(image, -1, kernel)
-        gray = cv2.cvtColor(sharpen_img, cv2.COLOR_BGR2GRAY)
-
-        inverse_img = 255 - gray
-        blurred_img = cv2.GaussianBlur(inverse_img, (11, 11), 0)
-
-        return cv2.cvtColor(cv2.divide(gray, 255 - blurred_img, scale=256), cv2.COLOR_GRAY2RGB)
+        return stages.get_stage('edges')
 
 
 class CartoonFilter(ImageFilter):
-    """Cartoon Filter"""
-    def __init__(self):
+    """Cartoon Filter. The colors are flattened with repeated bilateral filters on a
+    downsampled copy, the quality sets the number of passes and the pyramid level"""
+    def __init__(self, quality: str = CARTOON_QUALITY):
         super().__init__('CARTOON')
-        self.sketch_filter = SketchFilter()
+        self.quality = quality
 
-    def apply_filter(self, image: np.ndarray) -> np.ndarray:
+    def get_quality(self) -> str:
+        """Quality getter"""
+        return self.quality
+
+    def set_quality(self, quality: str):
+        """Quality setter, one of the keys of CARTOON_QUALITIES"""
+        if quality not in CARTOON_QUALITIES:
+            print(f'There is no cartoon quality with name {quality}')
+            return
+        self.quality = quality
+
+    def apply_stages(self, stages: FilterStages) -> np.ndarray:
         """Returns a cartoon effect in images."""
-        image_copy = image.copy()
-        edges = self.sketch_filter.apply_filter(image_copy)
+        settings = CARTOON_QUALITIES[self.quality]
+        edges = stages.get_stage('edges')
+
+        small_image = stages.get_stage('image')
+        sizes = []
+        for _ in range(settings.pyramid_levels):
+            sizes.append((small_image.shape[1], small_image.shape[0]))
+            small_image = cv2.pyrDown(small_image)
 
-        small_image = cv2.pyrDown(image_copy)
-        rep = 11
-        for _ in range(rep):
-            tmp = cv2.bilateralFilter(small_image, d=9, sigmaColor=9, sigmaSpace=7)
-            small_image = cv2.bilateralFilter(tmp, d=9, sigmaColor=9, sigmaSpace=7)
+        for _ in range(settings.passes):
+            small_image = cv2.bilateralFilter(small_image, d=settings.diameter,
+                                              sigmaColor=settings.sigma_color,
+                                              sigmaSpace=settings.sigma_space)
 
-        height, width, _ = edges.shape
-        image_copy = cv2.pyrUp(small_image, dstsize=(width, height))
+        for size in reversed(sizes):
+            small_image = cv2.pyrUp(small_image, dstsize=size)
 
-        return cv2.bitwise_and(image_copy, edges)
+        return cv2.bitwise_and(small_image, edges)
 
 
 class GrayScaleFilter(ImageFilter):
@@ -113,7 +333,6 @@ class GrayScaleFilter(ImageFilter):
     def __init__(self):
         super().__init__('GRAY')
 
-    def apply_filter(self, image: np.ndarray) -> np.ndarray:
+    def apply_stages(self, stages: FilterStages) -> np.ndarray:
         """Returns the sketch effect of images."""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+        return cv2.cvtColor(stages.get_stage('gray'), cv2.COLOR_GRAY2RGB)
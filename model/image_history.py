@@ -0,0 +1,285 @@
+"""Image history model file"""
+import atexit
+import dataclasses
+import itertools
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+TILE_SIZE = 256
+KEYFRAME_INTERVAL = 10
+MAX_CHANGED_TILES_RATIO = 0.5
+HISTORY_MEMORY_BUDGET = 512 * 1024 * 1024
+HISTORY_DISK_BUDGET = 4 * 1024 * 1024 * 1024
+PNG_COMPRESSION_LEVEL = 1
+
+VERSION_COUNTER = itertools.count()
+
+
+@dataclasses.dataclass
+class HistoryEntry:
+    """Step of the history. It is stored as a whole frame (keyframe), as the tiles
+    that changed with respect to the previous step or as the operations that
+    produce it from the previous step"""
+    shape: tuple
+    keyframe: Optional[np.ndarray] = None
+    tiles: Optional[Dict[Tuple[int, int], np.ndarray]] = None
+    operations: Optional[List[Callable]] = None
+    spilled_path: Optional[str] = None
+    spilled_size: int = 0
+    version: int = dataclasses.field(default_factory=lambda: next(VERSION_COUNTER))
+
+    def is_keyframe(self) -> bool:
+        """Checks if the entry stores the whole frame, in memory or on disk"""
+        return self.keyframe is not None or self.spilled_path is not None
+
+    def is_spilled(self) -> bool:
+        """Checks if the frame of the entry is stored on disk"""
+        return self.spilled_path is not None
+
+    def get_keyframe(self) -> np.ndarray:
+        """Keyframe getter, it is read back from disk if it was spilled"""
+        if self.keyframe is not None:
+            return self.keyframe
+        return cv2.imread(self.spilled_path, cv2.IMREAD_UNCHANGED)
+
+    def spill(self, path: str):
+        """Compresses the keyframe losslessly and moves it from memory to disk"""
+        ret, buffer = cv2.imencode('.png', self.keyframe,
+                                   [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION_LEVEL])
+        if not ret:
+            print(f'The history step could not be compressed into {path}')
+            return
+        buffer.tofile(path)
+        self.spilled_path = path
+        self.spilled_size = buffer.nbytes
+        self.keyframe = None
+
+    def remove_spilled_file(self):
+        """Deletes the file of a spilled keyframe"""
+        if self.spilled_path is not None:
+            try:
+                os.remove(self.spilled_path)
+            except OSError as error:
+                print(f'Error: {self.spilled_path} : {error.strerror}')
+
+    def get_size(self) -> int:
+        """Resident size in bytes"""
+        if self.keyframe is not None:
+            return self.keyframe.nbytes
+        if self.tiles:
+            return sum(tile.nbytes for tile in self.tiles.values())
+        return 0
+
+    def apply(self, image: np.ndarray, owned: bool) -> np.ndarray:
+        """Rebuilds the frame of this step given the frame of the previous one.
+        The previous frame is only modified in place if it is owned by the caller"""
+        if self.operations is not None:
+            for operation in self.operations:
+                image = operation(image)
+            return image
+        if self.tiles:
+            if not owned:
+                image = image.copy()
+            for (origin_y, origin_x), tile in self.tiles.items():
+                image[origin_y:origin_y + tile.shape[0], origin_x:origin_x + tile.shape[1]] = tile
+        return image
+
+
+class ImageHistory:
+    """Undo/redo history that stores every step as a delta against the previous one.
+    The keyframes that do not fit in the memory budget are spilled to a cache directory"""
+    def __init__(self, memory_budget: int = HISTORY_MEMORY_BUDGET,
+                 disk_budget: int = HISTORY_DISK_BUDGET,
+                 cache_directory: Optional[str] = None,
+                 tile_size: int = TILE_SIZE, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.entries: List[HistoryEntry] = []
+        self.idx_current_img = 0
+        self.current_image: Optional[np.ndarray] = None
+
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.tile_size = tile_size
+        self.keyframe_interval = keyframe_interval
+
+        self.parent_cache_directory = cache_directory
+        self.cache_directory: Optional[str] = None
+        self.spilled_file_counter = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def get_index(self) -> int:
+        """Current step index getter"""
+        return self.idx_current_img
+
+    def set_memory_budget(self, memory_budget: int):
+        """Memory budget setter, in bytes"""
+        self.memory_budget = memory_budget
+        self.enforce_memory_budget()
+
+    def set_disk_budget(self, disk_budget: int):
+        """Disk budget setter, in bytes"""
+        self.disk_budget = disk_budget
+        self.enforce_memory_budget()
+
+    def get_spilled_size(self) -> int:
+        """Bytes used by the history in the cache directory"""
+        return sum(entry.spilled_size for entry in self.entries)
+
+    def get_resident_size(self) -> int:
+        """Bytes kept in memory by the history, without counting the current frame"""
+        return sum(entry.get_size() for entry in self.entries
+                   if entry.keyframe is not self.current_image)
+
+    def reset(self, image: np.ndarray):
+        """Starts a new history with the given image"""
+        self.remove_entries(0)
+        self.entries = [HistoryEntry(shape=image.shape, keyframe=image)]
+        self.idx_current_img = 0
+        self.current_image = image
+
+    def insert(self, image: np.ndarray, operations: Optional[List[Callable]] = None):
+        """Inserts a new step after the current one, dropping the steps that could be redone"""
+        self.remove_entries(self.idx_current_img + 1)
+        self.entries.append(self.make_entry(self.current_image, image, operations))
+        self.idx_current_img += 1
+        self.current_image = image
+        self.enforce_memory_budget()
+
+    def undo(self):
+        """Moves to the previous step"""
+        if self.idx_current_img > 0:
+            self.idx_current_img -= 1
+            self.current_image = self.build_image(self.idx_current_img)
+
+    def redo(self):
+        """Moves to the next step"""
+        if self.idx_current_img < len(self.entries) - 1:
+            self.idx_current_img += 1
+            entry = self.entries[self.idx_current_img]
+            if entry.is_keyframe():
+                self.current_image = entry.get_keyframe()
+            else:
+                self.current_image = entry.apply(self.current_image, owned=False)
+
+    def get_current_image(self) -> np.ndarray:
+        """Current frame getter"""
+        return self.current_image
+
+    def get_current_version(self) -> Optional[int]:
+        """Unique identifier of the current frame"""
+        if not self.entries:
+            return None
+        return self.entries[self.idx_current_img].version
+
+    def replace_current_image(self, image: np.ndarray):
+        """Replaces the current step by a keyframe, the steps after it are dropped"""
+        self.remove_entries(self.idx_current_img)
+        self.entries.append(HistoryEntry(shape=image.shape, keyframe=image))
+        self.current_image = image
+        self.enforce_memory_budget()
+
+    def build_image(self, index: int) -> np.ndarray:
+        """Rebuilds the frame of a step from the nearest keyframe before it"""
+        keyframe_index = self.find_keyframe(index)
+        image = self.entries[keyframe_index].get_keyframe()
+        owned = self.entries[keyframe_index].is_spilled()
+        for entry in self.entries[keyframe_index + 1:index + 1]:
+            previous_image = image
+            image = entry.apply(image, owned)
+            owned = owned or image is not previous_image
+        return image
+
+    def find_keyframe(self, index: int) -> int:
+        """Index of the nearest keyframe before or at a given step"""
+        while not self.entries[index].is_keyframe():
+            index -= 1
+        return index
+
+    def make_entry(self, previous_image: np.ndarray, image: np.ndarray,
+                   operations: Optional[List[Callable]]) -> HistoryEntry:
+        """Chooses the most compact representation of a new step"""
+        steps_since_keyframe = len(self.entries) - self.find_keyframe(len(self.entries) - 1)
+        if steps_since_keyframe >= self.keyframe_interval:
+            return HistoryEntry(shape=image.shape, keyframe=image)
+        if operations:
+            return HistoryEntry(shape=image.shape, operations=list(operations))
+        if previous_image.shape == image.shape:
+            tiles = self.find_changed_tiles(previous_image, image)
+            if sum(tile.nbytes for tile in tiles.values()) <= \
+                    image.nbytes * MAX_CHANGED_TILES_RATIO:
+                return HistoryEntry(shape=image.shape, tiles=tiles)
+        return HistoryEntry(shape=image.shape, keyframe=image)
+
+    def find_changed_tiles(self, previous_image: np.ndarray,
+                           image: np.ndarray) -> Dict[Tuple[int, int], np.ndarray]:
+        """Copies the tiles of the image that differ from the previous one"""
+        tiles = {}
+        height, width = image.shape[:2]
+        for origin_y in range(0, height, self.tile_size):
+            for origin_x in range(0, width, self.tile_size):
+                tile_slice = (slice(origin_y, origin_y + self.tile_size),
+                              slice(origin_x, origin_x + self.tile_size))
+                if not np.array_equal(previous_image[tile_slice], image[tile_slice]):
+                    tiles[(origin_y, origin_x)] = image[tile_slice].copy()
+        return tiles
+
+    def remove_entries(self, first_index: int):
+        """Removes the steps from a given index onwards and their spilled files"""
+        for entry in self.entries[first_index:]:
+            entry.remove_spilled_file()
+        del self.entries[first_index:]
+
+    def enforce_memory_budget(self):
+        """Spills the oldest keyframes to disk while the history does not fit in the
+        memory budget, the oldest steps are dropped if it still does not fit"""
+        while True:
+            for entry in self.entries:
+                if self.get_resident_size() <= self.memory_budget:
+                    break
+                if entry.keyframe is not None and entry.keyframe is not self.current_image:
+                    entry.spill(self.make_spilled_file_path())
+
+            if self.idx_current_img == 0 or \
+                    (self.get_resident_size() <= self.memory_budget and
+                     self.get_spilled_size() <= self.disk_budget):
+                return
+            self.drop_oldest_entry()
+
+    def make_spilled_file_path(self) -> str:
+        """Returns a new file path in the cache directory, which is created on demand"""
+        if self.cache_directory is None:
+            if self.parent_cache_directory is not None:
+                os.makedirs(self.parent_cache_directory, exist_ok=True)
+            self.cache_directory = tempfile.mkdtemp(prefix='history-',
+                                                    dir=self.parent_cache_directory)
+            atexit.register(self.remove_cache_directory)
+        return os.path.join(self.cache_directory, f'{next(self.spilled_file_counter)}.png')
+
+    def remove_cache_directory(self):
+        """Deletes the cache directory and all the spilled keyframes"""
+        if self.cache_directory is not None:
+            shutil.rmtree(self.cache_directory, ignore_errors=True)
+            self.cache_directory = None
+
+    def drop_oldest_entry(self):
+        """Removes the first step, the next one becomes a keyframe"""
+        next_entry = self.entries[1]
+        if not next_entry.is_keyframe():
+            if self.idx_current_img == 1:
+                image = self.current_image
+            else:
+                image = self.build_image(1)
+            self.entries[1] = HistoryEntry(shape=next_entry.shape, keyframe=image,
+                                           version=next_entry.version)
+        self.entries[0].remove_spilled_file()
+        del self.entries[0]
+        self.idx_current_img -= 1
@@ -0,0 +1,38 @@
+"""Model loader file"""
+import threading
+from typing import Any, Callable, Optional
+
+
+class ModelLoader:
+    """Loads a machine learning model the first time it is needed, or in a background
+    thread when it is warmed up, so the application starts without waiting for it"""
+    def __init__(self, load: Callable[[], Any]):
+        self.load = load
+        self.model: Optional[Any] = None
+        self.lock = threading.Lock()
+        self.warm_up_thread: Optional[threading.Thread] = None
+
+    def is_loaded(self) -> bool:
+        """Checks if the model has been loaded"""
+        return self.model is not None
+
+    def get_model(self) -> Any:
+        """Model getter, it waits for the model to be loaded"""
+        with self.lock:
+            if self.model is None:
+                self.model = self.load()
+            return self.model
+
+    def warm_up(self):
+        """Starts loading the model in a background thread"""
+        if self.model is None and self.warm_up_thread is None:
+            self.warm_up_thread = threading.Thread(target=self.load_in_background,
+                                                   name='model-warm-up', daemon=True)
+            self.warm_up_thread.start()
+
+    def load_in_background(self):
+        """Loads the model, an error is only reported since it is loaded again when needed"""
+        try:
+            self.get_model()
+        except Exception as error:
+            print(f'Error: the model could not be loaded in the background: {error}')
@@ -6,9 +6,13 @@ from typing import Optional
 import numpy as np
 import cv2
 from mypy_extensions import TypedDict
+from PyQt5.QtCore import QPointF
+from PyQt5.QtGui import QPainterPath, QPolygonF
 
 MINIMUM_BRUSH_SIZE = 10
 MAXIMUM_BRUSH_SIZE = 100
+SPRAY_DENSITY = 0.025
+SPRAY_MINIMUM_RADIUS_RATIO = 0.15
 
 
 class ShapePainter(ABC):
@@ -28,74 +32,155 @@ class ShapePainter(ABC):
     def draw_on_image(self, img: np.ndarray, center_position: tuple, color: tuple):
         """Draws the shape on the image"""
 
+    @abstractmethod
+    def get_outline(self) -> QPainterPath:
+        """Outline of the shape centered at the origin"""
+
+
+class StampPainter(ShapePainter):
+    """Shape that is rasterized once per size into a stamp, which is copied onto the image.
+    The masks are drawn as the maximum of the mask and the stamp"""
+    def __init__(self, size: int):
+        super().__init__(size)
+        self.stamp: Optional[np.ndarray] = None
+
+    def set_size(self, size: int):
+        super().set_size(size)
+        self.stamp = None
+
+    def get_stamp(self) -> np.ndarray:
+        """Mask of the shape centered in a square of side twice the size plus one"""
+        if self.stamp is None:
+            radius = self.get_size()
+            stamp = np.zeros((2 * radius + 1, 2 * radius + 1), dtype=np.uint8)
+            self.draw_stamp(stamp, (radius, radius))
+            self.stamp = stamp
+        return self.stamp
+
+    @abstractmethod
+    def draw_stamp(self, stamp: np.ndarray, center_position: tuple):
+        """Rasterizes the shape on the stamp"""
 
-class RhombusPainter(ShapePainter):
+    def draw_on_image(self, img: np.ndarray, center_position: tuple, color: tuple):
+        stamp = self.get_stamp()
+        radius = stamp.shape[0] // 2
+        origin_x, origin_y = center_position[0] - radius, center_position[1] - radius
+        end_x = min(origin_x + stamp.shape[1], img.shape[1])
+        end_y = min(origin_y + stamp.shape[0], img.shape[0])
+        start_x, start_y = max(origin_x, 0), max(origin_y, 0)
+        if start_x >= end_x or start_y >= end_y:
+            return
+        stamp_region = stamp[start_y - origin_y:end_y - origin_y,
+                             start_x - origin_x:end_x - origin_x]
+        img_region = img[start_y:end_y, start_x:end_x]
+        if img.ndim == 2 and color[0] == 255:
+            cv2.max(img_region, stamp_region, dst=img_region)
+        elif img.ndim == 2:
+            np.copyto(img_region, color[0], where=stamp_region > 0, casting='unsafe')
+        else:
+            np.copyto(img_region, color[:img.shape[2]], where=stamp_region[..., None] > 0,
+                      casting='unsafe')
+
+
+class RhombusPainter(StampPainter):
     """Rhombus shape"""
     def __init__(self, size: int):
         super().__init__(size * 2)
 
     def set_size(self, size: int):
-        self.size = size * 2
+        super().set_size(size * 2)
 
     def get_size(self) -> int:
         return int(self.size / 2)
 
-    def draw_on_image(self, img: np.ndarray, center_position: tuple, color: tuple):
+    def draw_stamp(self, stamp: np.ndarray, center_position: tuple):
         pts = np.array([[center_position[0] - int(self.size / 2), center_position[1]],
                         [center_position[0], center_position[1] - int(self.size / 2)],
                         [center_position[0] + int(self.size / 2), center_position[1]],
                         [center_position[0], center_position[1] + int(self.size / 2)]],
                        np.int32)
         pts = pts.reshape((-1, 1, 2))
-        cv2.fillPoly(img, [pts], color)
+        cv2.fillPoly(stamp, [pts], 255)
+
+    def get_outline(self) -> QPainterPath:
+        half_size = int(self.size / 2)
+        outline = QPainterPath()
+        outline.addPolygon(QPolygonF([QPointF(-half_size, 0), QPointF(0, -half_size),
+                                      QPointF(half_size, 0), QPointF(0, half_size),
+                                      QPointF(-half_size, 0)]))
+        return outline
 
 
 class SprayEffect(ShapePainter):
-    """Spray effect shape"""
-    def __init__(self, radius: int):
+    """Spray effect shape, the number of points keeps the same density for every radius"""
+    def __init__(self, radius: int, density: float = SPRAY_DENSITY):
         super().__init__(radius)
-        self.points_number = int(np.pi * (self.size ^ 2) * 0.75)
+        self.density = density
+        self.points_number = get_spray_points_number(self.size, self.density)
+        self.random_generator = np.random.default_rng()
 
     def set_size(self, size: int):
         self.size = size
-        self.points_number = int(np.pi * (self.size ^ 2) * 0.75)
+        self.points_number = get_spray_points_number(self.size, self.density)
 
     def draw_on_image(self, img: np.ndarray, center_position: tuple, color: tuple):
-        minimum_radius_offset = int(self.size * 0.15)
-        for _ in range(self.points_number):
-            random_radius = np.random.randint(minimum_radius_offset, self.size + 1)
-            random_degree = np.random.randint(360)
+        minimum_radius_offset = int(self.size * SPRAY_MINIMUM_RADIUS_RATIO)
+        random_radius = self.random_generator.integers(minimum_radius_offset, self.size + 1,
+                                                       self.points_number)
+        random_angle = self.random_generator.uniform(0, 2 * np.pi, self.points_number)
+
+        x_coordinates = center_position[0] + (random_radius * np.cos(random_angle)).astype(int)
+        y_coordinates = center_position[1] + (random_radius * np.sin(random_angle)).astype(int)
+        inside_image = (x_coordinates >= 0) & (x_coordinates < img.shape[1]) & \
+                       (y_coordinates >= 0) & (y_coordinates < img.shape[0])
+        img[y_coordinates[inside_image], x_coordinates[inside_image]] = \
+            color[0] if img.ndim == 2 else color[:img.shape[2]]
+
+    def get_outline(self) -> QPainterPath:
+        outline = QPainterPath()
+        outline.addEllipse(QPointF(0, 0), self.size, self.size)
+        return outline
 
-            x_coordinate = int(random_radius * np.cos(np.radians(random_degree)))
-            y_coordinate = int(random_radius * np.sin(np.radians(random_degree)))
 
-            cv2.circle(img, (center_position[0] + x_coordinate, center_position[1] + y_coordinate),
-                       0, color, cv2.FILLED)
+def get_spray_points_number(radius: int, density: float) -> int:
+    """Number of points of a spray of a given radius, proportional to its area"""
+    return max(int(density * np.pi * radius ** 2), 1)
 
 
-class CirclePainter(ShapePainter):
+class CirclePainter(StampPainter):
     """Circle shape"""
-    def draw_on_image(self, img: np.ndarray, center_position: tuple, color: tuple):
-        cv2.circle(img, (center_position[0], center_position[1]),
-                   self.size, color, cv2.FILLED)
+    def draw_stamp(self, stamp: np.ndarray, center_position: tuple):
+        cv2.circle(stamp, (center_position[0], center_position[1]),
+                   self.size, 255, cv2.FILLED)
+
+    def get_outline(self) -> QPainterPath:
+        outline = QPainterPath()
+        outline.addEllipse(QPointF(0, 0), self.size, self.size)
+        return outline
 
 
-class SquarePainter(ShapePainter):
+class SquarePainter(StampPainter):
     """Square shape"""
     def __init__(self, size: int):
         super().__init__(size * 2)
 
     def set_size(self, size: int):
-        self.size = size * 2
+        super().set_size(size * 2)
 
     def get_size(self) -> int:
         return int(self.size / 2)
 
-    def draw_on_image(self, img: np.ndarray, center_position: tuple, color: tuple):
-        cv2.rectangle(img, (center_position[0] - int(self.size / 2),
-                            center_position[1] - int(self.size / 2)),
+    def draw_stamp(self, stamp: np.ndarray, center_position: tuple):
+        cv2.rectangle(stamp, (center_position[0] - int(self.size / 2),
+                              center_position[1] - int(self.size / 2)),
                       (center_position[0] + int(self.size / 2),
-                       center_position[1] + int(self.size / 2)), (255, 0, 0), -1)
+                       center_position[1] + int(self.size / 2)), 255, -1)
+
+    def get_outline(self) -> QPainterPath:
+        half_size = int(self.size / 2)
+        outline = QPainterPath()
+        outline.addRect(-half_size, -half_size, 2 * half_size, 2 * half_size)
+        return outline
 
 
 class ShapePainterDict(TypedDict):
@@ -134,6 +219,17 @@ class ShapePainterContainer:
         """Painter size getter"""
         return self.shape_painter_dict[self.shape_name].get_size()
 
+    def get_bounding_rect(self, center_position: tuple) -> tuple:
+        """Rectangle that contains the shape drawn at a position, as origin x, origin y,
+        width and height"""
+        radius = self.current_shape_painter.get_size() + 1
+        return center_position[0] - radius, center_position[1] - radius, \
+            2 * radius + 1, 2 * radius + 1
+
+    def get_outline(self) -> QPainterPath:
+        """Outline of the current shape centered at the origin"""
+        return self.current_shape_painter.get_outline()
+
     def draw_shape(self, img: np.ndarray, center_position: tuple, color: tuple):
         """Draws the shape on an image"""
         try:
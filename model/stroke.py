@@ -0,0 +1,43 @@
+"""Stroke model file"""
+from typing import List, Optional
+
+import numpy as np
+
+STROKE_SPACING_RATIO = 0.25
+
+
+class StrokeInterpolator:
+    """Turns the pointer samples of a stroke into dabs evenly spaced along the segments
+    between them, so the stroke does not depend on the rate of the pointer events"""
+    def __init__(self, spacing_ratio: float = STROKE_SPACING_RATIO):
+        self.spacing_ratio = spacing_ratio
+        self.last_position: Optional[np.ndarray] = None
+        self.distance_since_dab = 0.0
+
+    def get_spacing(self, brush_size: int) -> float:
+        """Distance between two dabs for a brush size, at least one pixel"""
+        return max(brush_size * self.spacing_ratio, 1.0)
+
+    def start(self, position: tuple) -> List[tuple]:
+        """Starts a new stroke, a dab is placed where it starts"""
+        self.last_position = np.array(position, dtype=float)
+        self.distance_since_dab = 0.0
+        return [(int(position[0]), int(position[1]))]
+
+    def add_sample(self, position: tuple, brush_size: int) -> List[tuple]:
+        """Returns the dabs of the segment from the previous sample to a new one"""
+        if self.last_position is None:
+            return self.start(position)
+        spacing = self.get_spacing(brush_size)
+        segment = np.array(position, dtype=float) - self.last_position
+        length = float(np.hypot(*segment))
+
+        distances = np.arange(max(spacing - self.distance_since_dab, 0.0), length, spacing)
+        if distances.size:
+            self.distance_since_dab = length - distances[-1]
+        else:
+            self.distance_since_dab += length
+        dab_positions = self.last_position + segment * (distances / max(length, 1e-9))[:, None]
+        self.last_position = self.last_position + segment
+        return [tuple(dab_position)
+                for dab_position in np.rint(dab_positions).astype(int).tolist()]
@@ -1,6 +1,6 @@
 """Deep Dream  view file"""
 from typing import Optional, List, Dict
-from PyQt5.QtWidgets import QToolBar, QAction, QToolButton
+from PyQt5.QtWidgets import QCheckBox, QToolBar, QAction, QToolButton
 
 from view.editing_tools import EditingToolAction
 from view.editing_tools.editing_tool import Tool, center_widgets_in_toolbar
@@ -51,6 +51,8 @@ class DeepDreamTools(Tool):
         self.dreams_list.append(self.random_action)
         self.random_button: Optional[QToolButton] = None
 
+        self.fast_mode_checkbox: Optional[QCheckBox] = None
+
     def add_widgets_and_actions_to_toolbar(self):
         self.build_buttons()
         self.toolbar.addWidget(self.holes_button)
@@ -58,6 +60,7 @@ class DeepDreamTools(Tool):
         self.toolbar.addWidget(self.shapes_button)
         self.toolbar.addWidget(self.stripes_button)
         self.toolbar.addWidget(self.random_button)
+        self.toolbar.addWidget(self.fast_mode_checkbox)
 
     def build_buttons(self):
         self.curly_button = build_tool_button(toolbar=self.toolbar,
@@ -94,3 +97,6 @@ class DeepDreamTools(Tool):
                                                icon_path='./resources/random.png',
                                                size=(0, 30))
         self.buttons[self.random_button.text()] = self.random_button
+
+        self.fast_mode_checkbox = QCheckBox('Fast')
+        self.fast_mode_checkbox.setToolTip('Dreams a smaller image and scales it up')
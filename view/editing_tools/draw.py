@@ -101,9 +101,8 @@ class EffectAction(QAction):
 
         self.cancel_effect = AcceptCancelContainer(self.toolbar)
 
-    def display_filter_buttons(self, filtered_images):
+    def display_filter_buttons(self):
         """Displays the filter buttons on the toolbar"""
         self.toolbar.clear()
-        self.button_container.update_button_image(filtered_images)
         self.button_container.add_widgets_and_actions_to_toolbar()
         self.cancel_effect.add_actions_to_toolbar()
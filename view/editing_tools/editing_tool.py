@@ -112,9 +112,17 @@ class ButtonContainer(Tool):
     def update_button_image(self, images):
         """Updates the image of the buttons"""
         for i, (name, img) in enumerate(images.items()):
-            icon = QIcon(img)
-            self.buttons[i].setIcon(icon)
-            self.buttons[i].setToolTip(name)
+            self.set_button_image(i, name, img)
+
+    def set_button_image(self, index: int, name: str, img: QPixmap):
+        """Updates the image of a single button"""
+        self.buttons[index].setIcon(QIcon(img))
+        self.buttons[index].setToolTip(name)
+
+    def set_button_names(self, names):
+        """Sets the names of the buttons before their images are available"""
+        for button, name in zip(self.buttons, names):
+            button.setToolTip(name)
 
     def build_buttons(self):
         pass
@@ -1,6 +1,11 @@
 """Image viewer view module"""
-from PyQt5.QtWidgets import QGraphicsScene, QGraphicsView, QFrame, QGraphicsPixmapItem
-from PyQt5.QtCore import QRectF, QMarginsF, QObject, pyqtSignal, QEvent, QPointF
+from PyQt5.QtWidgets import QGraphicsScene, QGraphicsView, QFrame, QGraphicsPixmapItem, \
+    QGraphicsPathItem, QGraphicsRectItem, QGraphicsLineItem
+from PyQt5.QtCore import QMarginsF, QObject, pyqtSignal, QEvent, QPointF, QRectF, Qt
+from PyQt5.QtGui import QPainterPath, QPen, QPixmap
+
+IMAGE_TILE_SIZE = 256
+CROP_HANDLE_SIZE = 8
 
 
 class ImageViewer:
@@ -13,15 +18,65 @@ class ImageViewer:
         self.graphics_pixmap = QGraphicsPixmapItem()
         self.graphics_pixmap.setAcceptHoverEvents(True)
         self.image_scene.addItem(self.graphics_pixmap)
+        self.image_tiles = {}
+        self.brush_cursor = BrushCursor(self.graphics_pixmap)
+        self.crop_frame = CropFrame(self.graphics_pixmap)
 
         self.signal_sender = SignalSender()
 
         self.assign_events()
 
-    def display_image(self, image):
-        """Displays the editing image"""
+    def display_image(self, image, scale: float = 1.0):
+        """Displays the editing image, enlarged by the scale if it is a preview"""
+        self.remove_image_tiles()
         self.graphics_pixmap.setPixmap(image)
-        self.image_scene.setSceneRect(QRectF(image.rect()).marginsAdded(QMarginsF(1, 1, 1, 1)))
+        self.graphics_pixmap.setScale(scale)
+        self.image_scene.setSceneRect(self.graphics_pixmap.sceneBoundingRect()
+                                      .marginsAdded(QMarginsF(1, 1, 1, 1)))
+
+    def update_image_region(self, image: QPixmap, origin_x: int, origin_y: int):
+        """Displays a tile of the image over the displayed one. The tiles are child items
+        of the image, so the events still reach it, and they are removed when a whole
+        image is displayed"""
+        tile_item = self.image_tiles.get((origin_x, origin_y))
+        if tile_item is None:
+            tile_item = QGraphicsPixmapItem(self.graphics_pixmap)
+            tile_item.setAcceptedMouseButtons(Qt.NoButton)
+            tile_item.setPos(origin_x, origin_y)
+            self.image_tiles[(origin_x, origin_y)] = tile_item
+        tile_item.setPixmap(image)
+
+    def remove_image_tiles(self):
+        """Removes the tiles displayed over the image"""
+        for tile_item in self.image_tiles.values():
+            tile_item.setParentItem(None)
+            self.image_scene.removeItem(tile_item)
+        self.image_tiles = {}
+
+    def display_brush_cursor(self, outline: QPainterPath, position: QPointF):
+        """Displays the outline of the brush over the image at a position of the image"""
+        if outline != self.brush_cursor.path():
+            self.brush_cursor.setPath(outline)
+        self.brush_cursor.setPos(position)
+        self.brush_cursor.show()
+
+    def hide_brush_cursor(self):
+        """Hides the outline of the brush"""
+        self.brush_cursor.hide()
+
+    def display_crop_frame(self, origin_x: int, origin_y: int, width: int, height: int):
+        """Displays the crop rectangle over the image"""
+        self.crop_frame.set_frame(QRectF(origin_x, origin_y, width, height))
+        self.crop_frame.show()
+
+    def hide_crop_frame(self):
+        """Hides the crop rectangle"""
+        self.crop_frame.hide()
+
+    def get_viewport_size(self) -> (int, int):
+        """Size of the area where the image is displayed, width and height"""
+        viewport_size = self.image_view.viewport().size()
+        return viewport_size.width(), viewport_size.height()
 
     def assign_events(self):
         """Assigns signals to the events"""
@@ -31,6 +86,66 @@ class ImageViewer:
         self.graphics_pixmap.mousePressEvent = self.signal_sender.pressed_image
 
 
+class BrushCursor(QGraphicsPathItem):
+    """Outline of the brush drawn over the image, in white and dashed black so it
+    can be seen on any colour. It does not take the mouse events of the image"""
+    def __init__(self, parent: QGraphicsPixmapItem):
+        super().__init__(parent)
+        self.setPen(QPen(Qt.white, 0))
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setZValue(1)
+        self.hide()
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(self.pen())
+        painter.drawPath(self.path())
+        painter.setPen(QPen(Qt.black, 0, Qt.DashLine))
+        painter.drawPath(self.path())
+
+
+class CropFrame(QGraphicsRectItem):
+    """Crop rectangle drawn over the image, with the rule of thirds guides and the
+    handles of its corners and sides. It does not take the mouse events of the image"""
+    def __init__(self, parent: QGraphicsPixmapItem):
+        super().__init__(parent)
+        self.setPen(QPen(Qt.white, 2))
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setZValue(1)
+
+        guide_pen = QPen(Qt.white, 1, Qt.DashLine)
+        self.guides = [QGraphicsLineItem(self) for _ in range(4)]
+        for guide in self.guides:
+            guide.setPen(guide_pen)
+            guide.setAcceptedMouseButtons(Qt.NoButton)
+
+        self.handles = [QGraphicsRectItem(-CROP_HANDLE_SIZE / 2, -CROP_HANDLE_SIZE / 2,
+                                          CROP_HANDLE_SIZE, CROP_HANDLE_SIZE, self)
+                        for _ in range(8)]
+        for handle in self.handles:
+            handle.setPen(QPen(Qt.black, 0))
+            handle.setBrush(Qt.white)
+            handle.setAcceptedMouseButtons(Qt.NoButton)
+        self.hide()
+
+    def set_frame(self, rect: QRectF):
+        """Moves the rectangle, its guides and its handles to a new shape"""
+        if rect == self.rect():
+            return
+        self.setRect(rect)
+        for third in (1, 2):
+            guide_x = rect.left() + rect.width() * third / 3
+            guide_y = rect.top() + rect.height() * third / 3
+            self.guides[third - 1].setLine(guide_x, rect.top(), guide_x, rect.bottom())
+            self.guides[third + 1].setLine(rect.left(), guide_y, rect.right(), guide_y)
+
+        handle_positions = [rect.topLeft(), QPointF(rect.center().x(), rect.top()),
+                            rect.topRight(), QPointF(rect.right(), rect.center().y()),
+                            rect.bottomRight(), QPointF(rect.center().x(), rect.bottom()),
+                            rect.bottomLeft(), QPointF(rect.left(), rect.center().y())]
+        for handle, position in zip(self.handles, handle_positions):
+            handle.setPos(position)
+
+
 class SignalSender(QObject):
     """Contains all the signals that are emitted when
     the events are triggered on the image viewer"""